@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Filesystem-operation benchmark for the copy-heavy paths of djgit.
+
+Generates a synthetic project (many small files, a few huge ones, deep nesting) with
+a local bare repository as its <code>origin</code>, and runs every case twice: cold
+(empty target) and warm (after rewriting ~1% of the small files).
+
+Cases:
+- <code>clone</code>: remote query plus creation and clone of the 'deploy' branch (<code>pipeline.sync_remote</code>).
+- <code>deploy-copytree</code>: rmtree + copytree of <code>src</code> into <code>.repo_deploy/&lt;name&gt;</code>, as <code>deploy.deploy</code> does.
+- <code>deploy-stage-{copy,link,reflink}</code>: the same target synchronised with <code>staging.stage_tree</code>.
+- <code>npm-stage-{copy,link,reflink}</code>: staging of <code>src/dependencies</code> as in <code>npm_deploy</code>.
+- <code>copylibs</code>, <code>copylibs-dedup</code>: a full <code>copylibs.main</code> snapshot (includes <code>pip freeze</code>).
+
+Each run executes in its own interpreter and reports wall time, bytes read/written
+and read/write syscalls (<code>/proc/self/io</code>: <code>rchar</code>, <code>wchar</code>,
+<code>syscr</code>, <code>syscw</code>; child processes such as git or pip are not
+included) and the peak disk use over the starting point, sampled with
+<code>statvfs</code> every few milliseconds (so other activity on the same
+filesystem shows up too).
+
+Uso:
+  python benchmarks/bench_fsops.py --small 20000 --huge 2 --huge-mb 256 --depth 8
+  python benchmarks/bench_fsops.py --json results.json
+  python benchmarks/bench_fsops.py --baseline results.json --threshold 0.15
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NAME = "project"
+
+CASES = ["clone", "deploy-copytree",
+         "deploy-stage-copy", "deploy-stage-link", "deploy-stage-reflink",
+         "npm-stage-copy", "npm-stage-link", "npm-stage-reflink",
+         "copylibs", "copylibs-dedup"]
+
+GIT_ENV = {"GIT_AUTHOR_NAME": "bench", "GIT_AUTHOR_EMAIL": "bench@localhost",
+           "GIT_COMMITTER_NAME": "bench", "GIT_COMMITTER_EMAIL": "bench@localhost"}
+
+
+# ---------- arbol sintetico ----------
+
+def _write(path, size, seed):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    block = (f"# {seed}\n" * 64).encode()
+    with open(path, "wb") as f:
+        f.write((block * (size // len(block) + 1))[:size])
+
+
+def make_project(workdir, small, huge, huge_mb, depth):
+    """Project with git history and a bare <code>origin</code>; returns its path."""
+    project = os.path.join(workdir, NAME)
+    remote = os.path.join(workdir, "remote.git")
+    env = dict(os.environ, **GIT_ENV)
+    subprocess.run(["git", "init", "-q", "--bare", remote], check=True)
+    os.makedirs(project)
+    for file in ["README.md", "LICENSE", ".gitignore", "requirements.txt"]:
+        _write(os.path.join(project, file), 256, file)
+    subprocess.run(["git", "init", "-q"], cwd=project, check=True)
+    subprocess.run(["git", "add", "."], cwd=project, check=True)
+    subprocess.run(["git", "commit", "-qm", "init"], cwd=project, check=True, env=env)
+    subprocess.run(["git", "remote", "add", "origin", remote], cwd=project, check=True)
+
+    # src/<anidado>/...: paquetes python; src/dependencies: lo que npm_deploy publica
+    for i in range(small):
+        nested = [f"d{(i // 50) % 7}", *[f"n{k}" for k in range(i % depth)]]
+        top = "dependencies" if i % 3 == 0 else f"pkg{i % 5}"
+        ext = ".js" if top == "dependencies" else ".py"
+        _write(os.path.join(project, "src", top, *nested, f"f{i}{ext}"), 200 + (i * 97) % 8000, i)
+    for i in range(huge):
+        path = os.path.join(project, "src", f"pkg{i % 5}", f"data{i}.bin")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            for _ in range(huge_mb):
+                f.write(os.urandom(1 << 20))
+    return project
+
+
+def touch_some(project, fraction=0.01):
+    """Rewrite about <code>fraction</code> of the small source files."""
+    files = []
+    for root, _, names in os.walk(os.path.join(project, "src")):
+        files += [os.path.join(root, n) for n in names if not n.endswith(".bin")]
+    files.sort()
+    step = max(1, int(1 / fraction))
+    for path in files[::step]:
+        with open(path, "a") as f:
+            f.write("# changed\n")
+    return len(files[::step])
+
+
+# ---------- medida (en el proceso hijo) ----------
+
+def _proc_io():
+    counters = {}
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                key, value = line.split(":")
+                counters[key] = int(value)
+    except OSError:
+        pass
+    return counters
+
+
+def _disk_used(path):
+    st = os.statvfs(path)
+    return (st.f_blocks - st.f_bfree) * st.f_frsize
+
+
+class DiskSampler(threading.Thread):
+    def __init__(self, path, interval=0.005):
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.start_used = _disk_used(path)
+        self.peak = self.start_used
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.peak = max(self.peak, _disk_used(self.path))
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        self.peak = max(self.peak, _disk_used(self.path))
+        return self.peak - self.start_used
+
+
+def _run_case(case):
+    from djgit import tracing
+    target = os.path.join(".repo_deploy", NAME)
+    if case == "clone":
+        from djgit.pipeline import sync_remote
+        from djgit.tools import RemoteInfo
+        shutil.rmtree(".repo_deploy", ignore_errors=True)
+        os.makedirs(".repo_deploy")
+        sync_remote(RemoteInfo.for_repo(ttl=0))
+    elif case == "deploy-copytree":
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        with tracing.stage("copy") as span:
+            tracing.copytree("src", target, span)
+    elif case.startswith("deploy-stage-"):
+        from djgit.staging import stage_tree
+        stage_tree("src", target, mode=case.rsplit("-", 1)[1])
+    elif case.startswith("npm-stage-"):
+        from djgit.npm_deploy import _stage_src
+        with tracing.stage("copy") as span:
+            _stage_src(os.path.join(".repo_deploy", "src"), span, case.rsplit("-", 1)[1])
+    elif case.startswith("copylibs"):
+        from djgit import copylibs
+        copylibs.main(dedup=case == "copylibs-dedup")
+    else:
+        raise ValueError(f"Unknown case: {case}")
+
+
+def child(case, project):
+    os.chdir(project)
+    sampler = DiskSampler(project)
+    sampler.start()
+    io0 = _proc_io()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        _run_case(case)
+    wall = time.perf_counter() - t0
+    io1 = _proc_io()
+    peak = sampler.stop()
+    result = {"wall": wall, "peak_disk": peak}
+    for key in ("rchar", "wchar", "syscr", "syscw"):
+        result[key] = io1.get(key, 0) - io0.get(key, 0)
+    print(json.dumps(result))
+
+
+# ---------- orquestacion ----------
+
+def run_child(case, project):
+    env = dict(os.environ, **GIT_ENV)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env.pop("DJGIT_TRACE", None)
+    res = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", case, "--project", project],
+                         capture_output=True, text=True, env=env)
+    if res.returncode != 0:
+        raise RuntimeError(f"{case} failed:\n{res.stderr}")
+    return json.loads(res.stdout.strip().splitlines()[-1])
+
+
+def _reset(case, project):
+    # estado de partida "en frio" de cada caso
+    if case.startswith("deploy-"):
+        shutil.rmtree(os.path.join(project, ".repo_deploy", NAME), ignore_errors=True)
+    elif case.startswith("npm-"):
+        shutil.rmtree(os.path.join(project, ".repo_deploy", "src"), ignore_errors=True)
+    elif case.startswith("copylibs"):
+        shutil.rmtree(os.path.join(project, ".copylibs"), ignore_errors=True)
+
+
+def _fmt_bytes(n):
+    for unit in ("B", "K", "M", "G"):
+        if abs(n) < 1024:
+            return f"{n:.0f}{unit}"
+        n /= 1024
+    return f"{n:.1f}T"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the copy-heavy paths of copylibs, deploy and npm_deploy")
+    ap.add_argument("--small", type=int, default=5000, help="Small files (0.2-8 KB)")
+    ap.add_argument("--huge", type=int, default=2, help="Huge files")
+    ap.add_argument("--huge-mb", type=int, default=64, help="Size of each huge file in MB")
+    ap.add_argument("--depth", type=int, default=6, help="Maximum nesting below each top-level folder")
+    ap.add_argument("--cases", default=",".join(CASES), help="Comma-separated subset of: " + ", ".join(CASES))
+    ap.add_argument("--workdir", default=None, help="Where to build the project (default: a temp dir)")
+    ap.add_argument("--json", default=None, help="Write the results to this file")
+    ap.add_argument("--baseline", default=None, help="Compare wall times with a previous --json file")
+    ap.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown reported as regression")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--project", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        return child(args.child, args.project)
+
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        ap.error(f"unknown cases: {unknown}")
+    # los casos deploy/npm necesitan el clon de la rama deploy
+    if any(c.startswith(("deploy-", "npm-")) for c in cases) and "clone" not in cases:
+        cases.insert(0, "clone")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="djgit-fsbench-")
+    try:
+        project = make_project(workdir, args.small, args.huge, args.huge_mb, args.depth)
+        print(f"project: {args.small} small files, {args.huge} x {args.huge_mb} MB, depth {args.depth} ({workdir})")
+        results = {}
+        for case in cases:
+            _reset(case, project)
+            cold = run_child(case, project)
+            touch_some(project)
+            if case.startswith("copylibs"):
+                time.sleep(1.1)  # los snapshots se nombran por segundo
+            warm = run_child(case, project)
+            results[case] = {"cold": cold, "warm": warm}
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'case':<22}{'run':<6}{'wall s':>9}{'read':>9}{'written':>9}{'syscr':>9}{'syscw':>9}{'peak disk':>11}")
+    for case, runs in results.items():
+        for run, r in runs.items():
+            print(f"{case:<22}{run:<6}{r['wall']:>9.3f}{_fmt_bytes(r['rchar']):>9}{_fmt_bytes(r['wchar']):>9}"
+                  f"{r['syscr']:>9}{r['syscw']:>9}{_fmt_bytes(r['peak_disk']):>11}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = 0
+        for case, runs in results.items():
+            for run, r in runs.items():
+                old = baseline.get(case, {}).get(run)
+                if old and old["wall"] > 0 and r["wall"] > old["wall"] * (1 + args.threshold):
+                    regressions += 1
+                    print(f"[REGRESSION] {case} ({run}): {old['wall']:.3f}s -> {r['wall']:.3f}s")
+        if regressions:
+            sys.exit(1)
+        print(f"[OK] no wall-time regression above {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the djgit console scripts.
+
+For every entry point it reports the cumulative import time of its module
+(from <code>python -X importtime</code>) and the wall time of running
+<code>--help</code>, next to the bare interpreter startup.
+
+Uso:
+  python benchmarks/startup.py --runs 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (console script, module, function)
+ENTRY_POINTS = [
+    ("djgit_copylibs", "djgit.copylibs", "cli"),
+    ("djgit_addpath", "djgit.addpath", "addpath"),
+    ("djgit_docs", "djgit.py2md_docs", "main"),
+    ("djgit_create_env", "djgit.create_env", "main"),
+    ("djgit_set_ps", "djgit.set_ps", "main"),
+    ("djgit_wine_setup", "djgit.wine_setup", "main"),
+    ("djgit_wheels", "djgit.wheelplan", "main"),
+    ("djgit", "djgit.cli", "main"),
+]
+
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def import_time_us(module):
+    """Cumulative import time of <code>module</code> in microseconds."""
+    res = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True, env=_env())
+    for line in res.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    return None
+
+
+def wall_time(code, runs):
+    """Best wall time in seconds of <code>python -c code</code> over <code>runs</code> runs."""
+    best = None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, env=_env())
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Measure startup cost of the djgit console scripts")
+    ap.add_argument("--runs", type=int, default=5, help="Runs per measurement (best is kept)")
+    args = ap.parse_args()
+
+    base = wall_time("pass", args.runs)
+    print(f"bare interpreter: {base * 1000:.1f} ms")
+    print(f"{'entry point':<20}{'import (ms)':>12}{'--help (ms)':>13}{'overhead':>10}")
+    for script, module, func in ENTRY_POINTS:
+        imp = import_time_us(module)
+        imp_ms = f"{imp / 1000:.1f}" if imp is not None else "?"
+        code = f"import sys; sys.argv = ['{script}', '--help']; from {module} import {func}; {func}()"
+        wall = wall_time(code, args.runs)
+        print(f"{script:<20}{imp_ms:>12}{wall * 1000:>13.1f}{(wall - base) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,32 @@
+from __future__ import annotations
+
 import sys
 import os
+import json
 import argparse
-import sysconfig
-import site
-from typing import Optional, List
+from collections.abc import Iterable
+
+# sysconfig, site and tempfile are imported where needed: with the site-packages
+# cache warm, a call of djgit_addpath never needs them.
+
+PTH_NAME = "conda.pth"
 
+# Cache of the resolved site directory, one entry per interpreter
+SITE_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "djgit", "site_packages.json")
 
-def _find_site_packages() -> Optional[str]:
+# In-process copy of SITE_CACHE (kept warm by a long-lived process such as djgit.daemon)
+_SITE_MEMO: dict[str, str] = {}
+
+
+def _find_site_packages() -> str | None:
     """
     Try several strategies to find an appropriate site-packages/dist-packages directory
     for the current interpreter/environment. Returns the first existing path found.
     """
-    candidates: List[str] = []
+    import site
+    import sysconfig
+
+    candidates: list[str] = []
 
     # sysconfig is the most reliable
     for key in ("purelib", "platlib"):
@@ -52,11 +67,145 @@ def _find_site_packages() -> Optional[str]:
     return None
 
 
+def _interpreter_key() -> str:
+    return f"{sys.executable}|{sys.prefix}|{sys.version}"
+
+
+def find_site_packages(use_cache: bool = True) -> str | None:
+    """
+    Cached version of <code>_find_site_packages()</code>. The result is stored per
+    interpreter in <code>~/.cache/djgit/site_packages.json</code> and reused while the
+    directory still exists.
+    """
+    key = _interpreter_key()
+    cache = {}
+    if use_cache:
+        memo = _SITE_MEMO.get(key)
+        if memo and os.path.isdir(memo):
+            return memo
+        try:
+            with open(SITE_CACHE, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        cached = cache.get(key)
+        if cached and os.path.isdir(cached):
+            _SITE_MEMO[key] = cached
+            return cached
+
+    site_dir = _find_site_packages()
+    if site_dir and use_cache:
+        _SITE_MEMO[key] = site_dir
+        cache[key] = site_dir
+        try:
+            os.makedirs(os.path.dirname(SITE_CACHE), exist_ok=True)
+            _write_atomic(SITE_CACHE, json.dumps(cache, indent=2))
+        except OSError:
+            pass  # the cache is only an optimisation
+    return site_dir
+
+
 def _normalize(p: str) -> str:
     """Normalize path for comparison (absolute + OS case rules)."""
     return os.path.normcase(os.path.abspath(p))
 
 
+def _write_atomic(path: str, content: str) -> None:
+    """Write <code>content</code> to a temp file next to <code>path</code> and rename it over."""
+    import tempfile
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".djgit-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        # mkstemp creates 0600 files; keep the permissions a plain open() would give
+        if os.path.exists(path):
+            mode = os.stat(path).st_mode & 0o777
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def read_pth(pth_file: str) -> list[str]:
+    """Non-empty lines of a <code>.pth</code> file (empty list if it does not exist)."""
+    if not os.path.exists(pth_file):
+        return []
+    with open(pth_file, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def update_pth(add: Iterable[str] = (), remove: Iterable[str] = (),
+               site_dir: str | None = None, pth_name: str = PTH_NAME) -> tuple[list[str], list[str]]:
+    """
+        Adds and removes many paths in the managed <code>.pth</code> file with a single
+        read and a single atomic write (temp file + <code>os.replace</code>).
+<table>
+  <thead>
+    <tr>
+      <th>Section</th>
+      <th>Description</th>
+    </tr>
+  </thead>
+  <tbody>
+    <tr>
+      <td><strong>Inputs</strong></td>
+      <td>
+        <code>add</code> (<em>list[str]</em>): Paths to add; must exist, duplicates are skipped.<br>
+        <code>remove</code> (<em>list[str]</em>): Paths to remove (compared normalized); removal wins over <code>add</code>.<br>
+        <code>site_dir</code> (<em>str</em>): Target directory; defaults to the cached site-packages.<br>
+        <code>pth_name</code> (<em>str</em>): Name of the <code>.pth</code> file (default <code>conda.pth</code>).
+      </td>
+    </tr>
+    <tr>
+      <td><strong>Outputs</strong></td>
+      <td>
+        <em>tuple</em>: <code>(added, removed)</code> lists of normalized paths. Raises <code>FileNotFoundError</code>
+        if a path to add does not exist and <code>RuntimeError</code> if no site-packages is found.
+      </td>
+    </tr>
+  </tbody>
+</table>
+"""
+    site_dir = site_dir or find_site_packages()
+    if not site_dir:
+        raise RuntimeError("No 'site-packages' / 'dist-packages' directory found for this interpreter.")
+    pth_file = os.path.join(site_dir, pth_name)
+
+    to_add = []
+    for p in add:
+        if not os.path.exists(p):
+            raise FileNotFoundError(f"Path {p} does not exist.")
+        to_add.append(_normalize(p))
+    to_remove = {_normalize(p) for p in remove}
+
+    lines = read_pth(pth_file)
+    kept = [line for line in lines if _normalize(line) not in to_remove]
+    removed = [_normalize(line) for line in lines if _normalize(line) in to_remove]
+
+    present = {_normalize(line) for line in kept}
+    added = []
+    for p in to_add:
+        if p not in present and p not in to_remove:
+            present.add(p)
+            kept.append(p)
+            added.append(p)
+
+    if added or removed or not os.path.exists(pth_file):
+        _write_atomic(pth_file, "".join(line + "\n" for line in kept))
+        if added or removed:
+            # keep the prebuilt module index (djgit.pathindex) in sync
+            from djgit.pathindex import refresh
+            refresh(site_dir)
+    return added, removed
+
+
 def addpath_python(path: str) -> None:
     """
             Adds a custom path to Python's search path (<code>sys.path</code>) by creating or updating a
@@ -108,7 +257,7 @@ djgit_addpath --path /path/to/my/path
     cmd_abs = _normalize(path)
 
     # 2) Locate a suitable site-packages/dist-packages directory
-    site_dir = _find_site_packages()
+    site_dir = find_site_packages()
     if not site_dir:
         print("[ERROR] No 'site-packages' / 'dist-packages' directory found for this interpreter.")
         return
@@ -116,42 +265,47 @@ djgit_addpath --path /path/to/my/path
     print(f"Using site-packages directory: {site_dir}")
 
     # 3) Target .pth file
-    pth_file = os.path.join(site_dir, "conda.pth")
+    pth_file = os.path.join(site_dir, PTH_NAME)
 
-    # Ensure file exists
+    # 4) Read, detect duplicates (normalized) and rewrite atomically
     try:
-        if not os.path.exists(pth_file):
-            # Create empty file
-            with open(pth_file, "a", encoding="utf-8"):
-                pass
+        added, _ = update_pth(add=[path], site_dir=site_dir)
     except OSError as e:
-        print(f"[ERROR] Could not create {pth_file}: {e}")
+        print(f"[ERROR] Could not update {pth_file}: {e}")
         return
 
-    # 4) Read existing entries and detect duplicates (normalized)
-    try:
-        with open(pth_file, "r", encoding="utf-8") as f:
-            raw_lines = [line.strip() for line in f.readlines() if line.strip()]
-    except OSError as e:
-        print(f"[ERROR] Could not read {pth_file}: {e}")
+    if not added:
+        print(f"[INFO] Path already present in {pth_file}: {cmd_abs}")
         return
 
-    existing_norm = {_normalize(line) for line in raw_lines}
+    print(f"[OK] Path successfully added to {pth_file}")
+    print(f"[OK] Added: {cmd_abs}")
 
-    if cmd_abs in existing_norm:
-        print(f"[INFO] Path already present in {pth_file}: {cmd_abs}")
-        return
 
-    # 5) Append the normalized absolute path
+def addpaths_python(add: Iterable[str] = (), remove: Iterable[str] = ()) -> bool:
+    """
+    Bulk version of <code>addpath_python()</code>: adds and removes many paths in a
+    single read-modify-atomic-write of <code>conda.pth</code>. Missing paths to add are
+    reported and skipped. Returns <code>True</code> on success.
+    """
+    add = list(add)
+    missing = [p for p in add if not os.path.exists(p)]
+    for p in missing:
+        print(f"[ERROR] Path {p} does not exist.")
+    add = [p for p in add if p not in missing]
+
     try:
-        with open(pth_file, "a", encoding="utf-8") as f:
-            f.write(cmd_abs + "\n")
-    except OSError as e:
-        print(f"[ERROR] Could not write to {pth_file}: {e}")
-        return
+        added, removed = update_pth(add=add, remove=remove)
+    except (OSError, RuntimeError) as e:
+        print(f"[ERROR] {e}")
+        return False
 
-    print(f"[OK] Path successfully added to {pth_file}")
-    print(f"[OK] Added: {cmd_abs}")
+    for p in added:
+        print(f"[OK] Added: {p}")
+    for p in removed:
+        print(f"[OK] Removed: {p}")
+    print(f"[OK] {len(added)} added, {len(removed)} removed")
+    return not missing
 
 
 def addpath() -> None:
@@ -165,12 +319,75 @@ def addpath() -> None:
     parser.add_argument(
         "--path",
         type=str,
-        required=True,
-        help="Path to add to the PYTHONPATH",
+        action="append",
+        default=[],
+        help="Path to add to the PYTHONPATH (repeat for several paths)",
+    )
+    parser.add_argument(
+        "--remove",
+        type=str,
+        action="append",
+        default=[],
+        help="Path to remove from the .pth file (repeat for several paths)",
+    )
+    parser.add_argument(
+        "--from-file",
+        type=str,
+        default=None,
+        help="File with one path to add per line",
+    )
+    parser.add_argument(
+        "--analyze",
+        action="store_true",
+        help="Measure the import cost of every managed .pth entry and suggest a cheaper order",
+    )
+    parser.add_argument(
+        "--apply-order",
+        action="store_true",
+        help="With --analyze, rewrite the .pth file in the suggested order",
+    )
+    parser.add_argument(
+        "--prune-missing",
+        action="store_true",
+        help="With --apply-order, also remove entries whose directory does not exist",
+    )
+    parser.add_argument(
+        "--index",
+        choices=["on", "off"],
+        default=None,
+        help="Enable/disable the prebuilt module index finder for the managed paths",
     )
     args = parser.parse_args()
 
-    addpath_python(args.path)
+    if args.index:
+        from djgit import pathindex
+        if args.index == "on":
+            pathindex.enable()
+        else:
+            pathindex.disable()
+        if not args.path and not args.remove and not args.from_file:
+            return
+
+    if args.analyze:
+        from djgit.pthcost import analyze, print_report, apply_order
+        report = analyze()
+        print_report(report)
+        if args.apply_order:
+            apply_order(report, prune_missing=args.prune_missing)
+        return
+
+    paths = list(args.path)
+    if args.from_file:
+        with open(args.from_file, "r", encoding="utf-8") as f:
+            paths += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    if not paths and not args.remove:
+        parser.error("at least one of --path, --remove, --from-file or --analyze is required")
+
+    if len(paths) == 1 and not args.remove:
+        addpath_python(paths[0])
+    elif not addpaths_python(paths, args.remove):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,160 @@
+"""
+Incremental replacement for <code>babel src --out-dir .</code> used by <code>npm_deploy</code>.
+
+A manifest (<code>.djgit-babel-manifest.json</code>) keeps the hash of every source file
+and of <code>.babelrc</code>. Only new or changed sources are transpiled, all of them in a
+single long-lived <code>node</code> process running <code>@babel/core</code>, and outputs
+whose sources were removed are deleted. Hashes come from <code>djgit.filehash</code>, whose
+stat-keyed cache (<code>.djgit-babel-hashcache.json</code>) avoids rereading unchanged sources.
+"""
+import json
+import os
+import subprocess
+
+from .filehash import HashCache, hash_file, hash_files
+
+MANIFEST = ".djgit-babel-manifest.json"
+HASH_CACHE = ".djgit-babel-hashcache.json"
+EXTENSIONS = (".js", ".jsx", ".es6", ".mjs", ".cjs")
+
+# Lee una peticion JSON por linea ({"src", "out"}) y responde una linea por fichero
+NODE_WORKER = r"""
+const babel = require('@babel/core');
+const fs = require('fs');
+const path = require('path');
+const readline = require('readline');
+const rl = readline.createInterface({ input: process.stdin });
+rl.on('line', (line) => {
+  const job = JSON.parse(line);
+  try {
+    const res = babel.transformFileSync(job.src, { cwd: process.cwd() });
+    fs.mkdirSync(path.dirname(job.out), { recursive: true });
+    fs.writeFileSync(job.out, res.code + '\n');
+    process.stdout.write(JSON.stringify({ src: job.src, ok: true }) + '\n');
+  } catch (e) {
+    process.stdout.write(JSON.stringify({ src: job.src, ok: false, error: String(e.message) }) + '\n');
+  }
+});
+"""
+
+
+def _load_manifest(root):
+    path = os.path.join(root, MANIFEST)
+    if not os.path.exists(path):
+        return {"babelrc": None, "files": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(root, manifest):
+    path = os.path.join(root, MANIFEST)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def _sources(src_dir):
+    for folder, dirs, files in os.walk(src_dir):
+        dirs[:] = [d for d in dirs if d != "node_modules"]
+        for file in files:
+            if file.endswith(EXTENSIONS):
+                yield os.path.join(folder, file)
+
+
+def _output_for(rel_src, out_dir):
+    # igual que la CLI de babel: misma ruta relativa con extension .js
+    return os.path.join(out_dir, os.path.splitext(rel_src)[0] + ".js")
+
+
+def transpile(jobs, root="."):
+    """
+    Transpile <code>[(src, out), ...]</code> with one node process.
+    Returns the list of <code>(src, error)</code> for the files that failed.
+    """
+    if not jobs:
+        return []
+    proc = subprocess.Popen(
+        ["node", "-e", NODE_WORKER],
+        cwd=root,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    requests = "".join(json.dumps({"src": src, "out": out}) + "\n" for src, out in jobs)
+    stdout, _ = proc.communicate(requests)
+    if proc.returncode != 0:
+        raise RuntimeError(f"babel worker exited with status {proc.returncode}")
+    failed = []
+    for line in stdout.splitlines():
+        res = json.loads(line)
+        if not res["ok"]:
+            failed.append((res["src"], res["error"]))
+    return failed
+
+
+def build(root=".", src_dir="src", out_dir="."):
+    """
+    Incrementally transpile <code>root/src_dir</code> into <code>root/out_dir</code>.
+    Returns a dict with the number of <code>compiled</code>, <code>unchanged</code>,
+    <code>removed</code> and <code>failed</code> files. The previous output of a file
+    that fails to transpile is deleted, so it is not deployed stale.
+
+    Example usage:
+    ```python
+    from djgit.babel_build import build
+    build(".repo_deploy")
+    ```
+    """
+    manifest = _load_manifest(root)
+    old_files = manifest["files"]
+
+    babelrc = os.path.join(root, ".babelrc")
+    babelrc_hash = hash_file(babelrc) if os.path.exists(babelrc) else None
+    # un cambio en .babelrc invalida todas las salidas
+    if babelrc_hash != manifest["babelrc"]:
+        old_files = {}
+
+    src_root = os.path.join(root, src_dir)
+    files = {}
+    jobs = []
+    sources = list(_sources(src_root))
+    cache = HashCache(os.path.join(root, HASH_CACHE))
+    digests = hash_files(sources, cache=cache)
+    cache.prune(sources)
+    cache.save()
+    for path in sources:
+        rel = os.path.relpath(path, src_root)
+        out = _output_for(rel, out_dir)
+        digest = digests[path]
+        files[rel] = {"hash": digest, "out": out}
+        prev = old_files.get(rel)
+        if prev is None or prev["hash"] != digest or not os.path.exists(os.path.join(root, out)):
+            jobs.append((os.path.join(src_dir, rel), out))
+
+    removed = 0
+    for rel, entry in manifest["files"].items():
+        if rel not in files:
+            out = os.path.join(root, entry["out"])
+            if os.path.exists(out):
+                os.remove(out)
+            removed += 1
+
+    print(f"babel: {len(jobs)} de {len(files)} ficheros cambiados, {removed} eliminados")
+    failed = transpile(jobs, root=root)
+    outputs = dict(jobs)
+    for src, error in failed:
+        print(f"[ERROR] babel {src}: {error}")
+        # sin hash en el manifest: se reintenta en la siguiente ejecucion
+        files.pop(os.path.relpath(src, src_dir), None)
+        # la salida anterior ya no corresponde al fuente: no debe publicarse
+        out = os.path.join(root, outputs[src])
+        if os.path.exists(out):
+            os.remove(out)
+
+    _save_manifest(root, {"babelrc": babelrc_hash, "files": files})
+    return {
+        "compiled": len(jobs) - len(failed),
+        "unchanged": len(files) - (len(jobs) - len(failed)),
+        "removed": removed,
+        "failed": len(failed),
+    }
@@ -0,0 +1,181 @@
+"""
+Bytecode precompilation of a staged package tree.
+
+Every <code>.py</code> under the tree gets a hash-based <code>.pyc</code> in its
+<code>__pycache__</code> (PEP 552): <code>checked</code> pycs are validated against the
+source hash on import, <code>unchecked</code> ones are trusted as long as they exist.
+Neither depends on file mtimes, and the recorded file names are relative to the tree,
+so the output is reproducible across machines and checkouts.
+
+Compiled files are kept in <code>cache_dir</code>; on the next run, a source whose hash
+matches the cached pyc reuses it instead of being compiled again. The rest is compiled
+in a process pool.
+
+The pycs are only used by the interpreter that matches their cache tag
+(<code>sys.implementation.cache_tag</code>, e.g. <code>cpython-311</code>): build with the same
+Python version as the workers, otherwise they are ignored and the sources compiled
+again. Since the project <code>.gitignore</code> usually excludes <code>*.pyc</code>,
+<code>unignore_pycache</code> writes a <code>.gitignore</code> in the package that
+re-includes them, so they are committed to the deploy branch. Workers must install the
+package with <code>pip install --no-compile</code>: pip's own compile step does not
+recognise hash-based pycs and would overwrite them with timestamp-based ones.
+
+Example usage:
+```python
+compile_bytecode(".repo_deploy/mypkg", cache_dir=".repo_deploy.pycache", mode="checked")
+```
+"""
+import importlib.util
+import os
+import py_compile
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+MODES = {
+    "checked": py_compile.PycInvalidationMode.CHECKED_HASH,
+    "unchecked": py_compile.PycInvalidationMode.UNCHECKED_HASH,
+}
+PYC_CACHE = ".repo_deploy.pycache"
+
+# flags de la cabecera del pyc (PEP 552)
+_FLAG_HASH = 0b01
+_FLAG_CHECK = 0b10
+
+
+def _sources(tree):
+    for root, dirs, files in os.walk(tree):
+        dirs[:] = [d for d in dirs if d != "__pycache__"]
+        for file in files:
+            if file.endswith(".py"):
+                yield os.path.relpath(os.path.join(root, file), tree)
+
+
+def _pyc_matches(pyc_path, source_hash, mode):
+    """True if <code>pyc_path</code> is a pyc of this interpreter for <code>source_hash</code> in <code>mode</code>."""
+    try:
+        with open(pyc_path, "rb") as f:
+            header = f.read(16)
+    except OSError:
+        return False
+    if len(header) < 16 or header[:4] != importlib.util.MAGIC_NUMBER:
+        return False
+    flags = int.from_bytes(header[4:8], "little")
+    expected = _FLAG_HASH | (_FLAG_CHECK if mode == "checked" else 0)
+    return flags == expected and header[8:16] == source_hash
+
+
+def _compile_one(job):
+    source, pyc, display_name, mode = job
+    try:
+        py_compile.compile(source, cfile=pyc, dfile=display_name, doraise=True,
+                           invalidation_mode=MODES[mode], optimize=0)
+        return display_name, None
+    except py_compile.PyCompileError as e:
+        return display_name, str(e)
+
+
+def compile_bytecode(tree, cache_dir=PYC_CACHE, mode="checked", workers=None, prefix=None):
+    """
+    Precompile every <code>.py</code> under <code>tree</code> with a process pool.
+    <code>prefix</code> is prepended to the recorded file names (default: the tree's
+    folder name). Returns a dict with <code>compiled</code>, <code>reused</code> and
+    <code>failed</code> (list of <code>(file, error)</code>).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Invalid mode: {mode}. Use {list(MODES)}")
+    prefix = os.path.basename(os.path.abspath(tree)) if prefix is None else prefix
+
+    reused, jobs = 0, []
+    targets = []
+    for rel in _sources(tree):
+        source = os.path.join(tree, rel)
+        pyc_rel = os.path.relpath(importlib.util.cache_from_source(source), tree)
+        pyc = os.path.join(tree, pyc_rel)
+        targets.append(pyc_rel)
+        with open(source, "rb") as f:
+            source_hash = importlib.util.source_hash(f.read())
+        cached = os.path.join(cache_dir, pyc_rel) if cache_dir else None
+        if cached and _pyc_matches(cached, source_hash, mode):
+            os.makedirs(os.path.dirname(pyc), exist_ok=True)
+            shutil.copy2(cached, pyc)
+            reused += 1
+        else:
+            jobs.append((source, pyc, os.path.join(prefix, rel), mode))
+
+    failed = []
+    if jobs:
+        # pocas fuentes: no compensa arrancar procesos
+        if len(jobs) < 8 or workers == 1:
+            results = list(map(_compile_one, jobs))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_compile_one, jobs, chunksize=16))
+        failed = [(name, err) for name, err in results if err]
+
+    if cache_dir:
+        _sync_cache(tree, cache_dir, targets)
+    return {"compiled": len(jobs) - len(failed), "reused": reused, "failed": failed}
+
+
+def _sync_cache(tree, cache_dir, targets):
+    # la cache refleja exactamente el último árbol compilado
+    wanted = set(targets)
+    for root, _, files in os.walk(cache_dir):
+        for file in files:
+            path = os.path.join(root, file)
+            if os.path.relpath(path, cache_dir) not in wanted:
+                os.remove(path)
+    for rel in targets:
+        src, dst = os.path.join(tree, rel), os.path.join(cache_dir, rel)
+        if not os.path.exists(src):
+            continue
+        if os.path.exists(dst) and os.stat(dst).st_mtime_ns == os.stat(src).st_mtime_ns:
+            continue  # reutilizado de la cache en esta misma pasada
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.copy2(src, dst)
+
+
+GITIGNORE_RULES = ["!__pycache__/", "!*.pyc"]
+
+
+def unignore_pycache(package_dir):
+    """
+    Append to <code>package_dir/.gitignore</code> the negations that override a parent
+    <code>*.pyc</code> or <code>__pycache__/</code> rule, so <code>git add</code> picks up the
+    precompiled files.
+    """
+    path = os.path.join(package_dir, ".gitignore")
+    lines = []
+    if os.path.exists(path):
+        with open(path) as f:
+            lines = f.read().splitlines()
+    missing = [rule for rule in GITIGNORE_RULES if rule not in lines]
+    if missing:
+        with open(path, "a") as f:
+            if lines and lines[-1]:
+                f.write("\n")
+            f.write("# .pyc precompilados por djgit (deploy --bytecode): se publican\n")
+            f.write("\n".join(missing) + "\n")
+    return path
+
+
+def pyc_package_data(root, package):
+    """
+    <code>package_data</code> entries that ship the <code>__pycache__/*.pyc</code> files
+    of <code>package</code> (a folder under <code>root</code>) and of its subpackages.
+    """
+    data = {}
+    for dirpath, dirs, files in os.walk(os.path.join(root, package)):
+        dirs[:] = [d for d in dirs if d != "__pycache__"]
+        if "__init__.py" in files:
+            dotted = os.path.relpath(dirpath, root).replace(os.sep, ".")
+            data[dotted] = ["__pycache__/*.pyc"]
+    return data
+
+
+def merge_package_data(package_data, extra):
+    merged = {key: list(value) for key, value in package_data.items()}
+    for key, globs in extra.items():
+        merged.setdefault(key, [])
+        merged[key] += [g for g in globs if g not in merged[key]]
+    return merged
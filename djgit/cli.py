@@ -0,0 +1,86 @@
+"""
+Single <code>djgit</code> command that dispatches to the individual tools.
+
+<code>djgit &lt;command&gt; [args...]</code> is equivalent to the matching
+<code>djgit_&lt;command&gt;</code> console script; the module of the command is only
+imported when it runs. <code>docs</code> is sent to the resident daemon
+(<code>djgit daemon start</code>) when one is running, so repeated builds reuse its warm
+parse and render caches. Without a daemon, or with
+<code>DJGIT_NO_DAEMON=1</code>, every command runs in-process.
+
+Example usage:
+```bash
+djgit daemon start
+djgit docs --src src --out docs/reference
+djgit addpath --path src
+djgit daemon stop
+```
+"""
+import importlib
+import os
+import sys
+
+# comando -> (modulo, funcion de entrada)
+COMMANDS = {
+    "copylibs": ("djgit.copylibs", "cli"),
+    "addpath": ("djgit.addpath", "addpath"),
+    "docs": ("djgit.py2md_docs", "main"),
+    "create_env": ("djgit.create_env", "main"),
+    "set_ps": ("djgit.set_ps", "main"),
+    "wine_setup": ("djgit.wine_setup", "main"),
+    "wheels": ("djgit.wheelplan", "main"),
+}
+
+# Comandos que se ejecutan en el daemon: no lanzan subprocesos que escriban directamente
+# en la terminal ni leen stdin, y sus caches compensan el viaje por el socket. addpath y
+# set_ps son mas rapidos en el propio proceso que conectando al daemon
+DAEMON_COMMANDS = {"docs"}
+
+
+def usage():
+    lines = ["usage: djgit <command> [args...]", "", "commands:"]
+    lines += [f"  {name}" for name in COMMANDS]
+    lines += ["  daemon {start,stop,status,serve}", "",
+              "Run 'djgit <command> --help' for the options of each command."]
+    return "\n".join(lines)
+
+
+def run(command, args):
+    """Run <code>command</code> in this process with <code>args</code> as its command line."""
+    module, func = COMMANDS[command]
+    entry = getattr(importlib.import_module(module), func)
+    saved = sys.argv
+    sys.argv = [f"djgit {command}", *args]
+    try:
+        entry()
+    finally:
+        sys.argv = saved
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return
+
+    command, args = argv[0], argv[1:]
+    if command == "daemon":
+        from djgit import daemon
+        daemon.main(args)
+        return
+    if command not in COMMANDS:
+        print(usage(), file=sys.stderr)
+        print(f"djgit: error: unknown command '{command}'", file=sys.stderr)
+        sys.exit(2)
+
+    if command in DAEMON_COMMANDS and os.environ.get("DJGIT_NO_DAEMON") != "1":
+        from djgit import daemon
+        code = daemon.call(argv)
+        if code is not None:
+            sys.exit(code)
+
+    run(command, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,68 @@
 import importlib
 import os, shutil
 
-def main():
+# Carpetas que no se copian al vendorizar (patrón en el nombre del módulo -> subcarpeta)
+PRUNE = {"djlmp": "lammps", "runstep": "simulations"}
+
+# fecha fija en las entradas del zip: mismo contenido -> mismo fichero
+ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+
+def _pruned(name):
+    return [folder for key, folder in PRUNE.items() if key in name]
+
+
+def bundle_package(src, name, dest_zip, bytecode=False, exclude=(), span=None):
+    """
+    Pack the package folder <code>src</code> as <code>name/...</code> into
+    <code>dest_zip</code> (uncompressed, entries sorted with a fixed date), loadable
+    with <code>zipimport</code> once the zip is on <code>sys.path</code>. With
+    <code>bytecode</code>, an unchecked hash-based <code>.pyc</code> is stored next to every
+    <code>.py</code>; the snapshot never changes, so the source is not re-hashed on import (files that do not compile, e.g. Python 2 only modules, are stored
+    without one). Returns <code>False</code> (and writes nothing) if the package contains
+    extension modules, which <code>zipimport</code> cannot load.
+    """
+    import py_compile
+    import tempfile
+    import zipfile
+    from importlib import machinery
+
+    files = []
+    for root, dirs, names in os.walk(src):
+        rel_root = os.path.relpath(root, src)
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__"
+                         and not (rel_root == "." and d in exclude))
+        for file in sorted(names):
+            if file.endswith(tuple(machinery.EXTENSION_SUFFIXES)):
+                return False
+            if not file.endswith((".pyc", ".pyo")):
+                files.append(os.path.normpath(os.path.join(rel_root, file)))
+
+    tmp = dest_zip + ".tmp"
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_STORED) as zf, tempfile.TemporaryDirectory() as pyc_dir:
+        cfile = os.path.join(pyc_dir, "module.pyc")
+        for rel in files:
+            arcname = "/".join([name] + rel.split(os.sep))
+            with open(os.path.join(src, rel), "rb") as f:
+                data = f.read()
+            entries = [(arcname, data)]
+            if bytecode and rel.endswith(".py"):
+                try:
+                    py_compile.compile(os.path.join(src, rel), cfile=cfile, dfile=arcname, doraise=True,
+                                       invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+                    with open(cfile, "rb") as f:
+                        entries.append((arcname + "c", f.read()))
+                except py_compile.PyCompileError as e:
+                    print(f"[WARN] {arcname}: no .pyc ({e.exc_type_name})")
+            for entry, content in entries:
+                zf.writestr(zipfile.ZipInfo(entry, ZIP_DATE), content)
+                if span is not None:
+                    span.add(bytes=len(content), files=1)
+    os.replace(tmp, dest_zip)
+    return True
+
+
+def main(trace=None, bundle="dir", bytecode=False, dedup=False):
     """
 Creates a timestamped snapshot of the current project by freezing dependencies, separating VCS-based packages from standard ones, vendoring importable VCS modules for pruning, and copying the working tree into <code>.copylibs/<timestamp></code>. Temporary files are cleaned up, and a consolidated <code>requirements.txt</code> is written inside the snapshot.
 <table>
@@ -32,15 +93,24 @@ Creates a timestamped snapshot of the current project by freezing dependencies,
   <li>Overwrites temporary files and deletes the <code>dependencies</code> directory if it exists.</li>
   <li>Import errors for VCS modules are caught and printed; those modules are skipped.</li>
   <li>Prunes <code>lammps</code> (for modules containing <code>djlmp</code>) and <code>simulations</code> (for modules containing <code>runstep</code>) after vendoring.</li>
+  <li>With <code>bundle="zip"</code> each VCS module is packed into <code>dependencies/&lt;name&gt;.zip</code> (see <code>bundle_package</code>; <code>bytecode=True</code> adds precompiled <code>.pyc</code>). Put the zip on <code>sys.path</code> (e.g. <code>djgit_addpath --path dependencies/&lt;name&gt;.zip</code>) to import it. Modules with compiled extensions are still copied as folders.</li>
+  <li>With <code>dedup=True</code> the snapshot files are hard links into <code>.copylibs/.store</code> (see <code>djgit.retention</code>), so files unchanged since a previous snapshot take no extra space.</li>
   <li>File operations may raise <code>OSError</code> or <code>shutil.Error</code> depending on permissions and filesystem state.</li>
+  <li>Stage timings are written to <code>trace</code> (or <code>$DJGIT_TRACE</code>) when given, see <code>djgit.tracing</code>.</li>
 </ul>
 <p>Example usage:</p>
 ```bash
 djgit_copylibs  
+djgit_copylibs --bundle zip --bytecode
 ```
 """
+    from djgit import tracing
+
+    if trace:
+        tracing.enable(trace)
 
-    os.system("pip freeze > requirements_temp.txt")
+    with tracing.stage("pip freeze"):
+        os.system("pip freeze > requirements_temp.txt")
     def read_requirements():
         with open('requirements_temp.txt') as f:
             return f.read().splitlines()
@@ -86,17 +156,24 @@ djgit_copylibs
     os.makedirs(dev_folder, exist_ok=True)
 
     for mod in mods:
+        if bundle == "zip":
+            print(f"bundling {mod['name']} into {dev_folder}/{mod['name']}.zip")
+            with tracing.stage("bundle", target=mod['name']) as span:
+                packed = bundle_package(mod['path'][0], mod['name'], f"{dev_folder}/{mod['name']}.zip",
+                                        bytecode=bytecode, exclude=_pruned(mod['name']), span=span)
+            if packed:
+                continue
+            print(f"[WARN] {mod['name']} contains extension modules: copying it as a folder")
+
         print(f"copying {mod['name']} to {dev_folder}")
         print(mod['path'])
         print(f"{dev_folder}/{mod['name']}")
-        shutil.copytree(mod['path'][0], f"{dev_folder}/{mod['name']}")
-
-        if "djlmp" in mod['name']:
-            if os.path.exists(f"{dev_folder}/{mod['name']}/lammps"):
-                shutil.rmtree(f"{dev_folder}/{mod['name']}/lammps")
-        if "runstep" in mod['name']:
-            if os.path.exists(f"{dev_folder}/{mod['name']}/simulations"):
-                shutil.rmtree(f"{dev_folder}/{mod['name']}/simulations")
+        with tracing.stage("copy", target=mod['name']) as span:
+            tracing.copytree(mod['path'][0], f"{dev_folder}/{mod['name']}", span)
+
+        for folder in _pruned(mod['name']):
+            if os.path.exists(f"{dev_folder}/{mod['name']}/{folder}"):
+                shutil.rmtree(f"{dev_folder}/{mod['name']}/{folder}")
     # add to gitignore
 
 
@@ -128,12 +205,23 @@ djgit_copylibs
     print(dirs)
     # copy others 
 
-    for d in dirs:
-        print(f"copying {d}")
-        if os.path.isdir(d):
-            shutil.copytree(f"{d}", f".copylibs/{now_str}/{d}")
-        else:
-            shutil.copy(f"{d}", f".copylibs/{now_str}/{d}")
+    # dedup: enlaces duros a objetos compartidos en .copylibs/.store
+    if dedup:
+        from djgit.retention import Store
+        store = Store()
+        copy_file = copy_tree_file = store.link_copy
+    else:
+        copy_file, copy_tree_file = shutil.copy, shutil.copy2
+
+    with tracing.stage("copy", target="snapshot") as span:
+        for d in dirs:
+            print(f"copying {d}")
+            if os.path.isdir(d):
+                tracing.copytree(f"{d}", f".copylibs/{now_str}/{d}", span, copy_function=copy_tree_file)
+            else:
+                tracing.copy(f"{d}", f".copylibs/{now_str}/{d}", span, copy_function=copy_file)
+    if dedup:
+        store.save()
 
 
     #  mv requirements_temp_no_git.txt requirements.txt
@@ -147,4 +235,38 @@ djgit_copylibs
     # remove dependencies
     shutil.rmtree("dependencies")
 
-    return f".copylibs/{now_str}"
\ No newline at end of file
+    return f".copylibs/{now_str}"
+
+
+def cli():
+    """Command-line entry point of <code>djgit_copylibs</code>."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Snapshot the project and its VCS dependencies into .copylibs/<timestamp>")
+    parser.add_argument("--bundle", choices=["dir", "zip"], default="dir",
+                        help="Vendor each VCS dependency as a folder (default) or as a zipimport archive")
+    parser.add_argument("--bytecode", action="store_true",
+                        help="With --bundle zip, store precompiled .pyc files in the archives")
+    parser.add_argument("--trace", default=None, help="Write stage timings to this file (.json or .jsonl)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Hard-link snapshot files into the shared .copylibs/.store")
+    retention = parser.add_argument_group("retention (applied after the snapshot)")
+    retention.add_argument("--keep-last", type=int, default=None, help="Keep the N newest snapshots")
+    retention.add_argument("--keep-daily", type=int, default=None, help="Keep the newest snapshot of each of the last N days")
+    retention.add_argument("--keep-weekly", type=int, default=None, help="Keep the newest snapshot of each of the last N weeks")
+    retention.add_argument("--max-bytes", default=None,
+                           help="Drop the oldest snapshots until the unique size fits, e.g. 20G")
+    retention.add_argument("--gc-only", action="store_true", help="Only apply retention, do not take a snapshot")
+    retention.add_argument("--dry-run", action="store_true", help="Show what retention would delete")
+    args = parser.parse_args()
+
+    snapshot = None
+    if not args.gc_only:
+        snapshot = main(trace=args.trace, bundle=args.bundle, bytecode=args.bytecode, dedup=args.dedup)
+
+    policies = (args.keep_last, args.keep_daily, args.keep_weekly, args.max_bytes)
+    if any(p is not None for p in policies) or args.gc_only:
+        from djgit.retention import gc, parse_size
+        gc(keep_last=args.keep_last, keep_daily=args.keep_daily, keep_weekly=args.keep_weekly,
+           max_bytes=parse_size(args.max_bytes) if args.max_bytes else None, dry_run=args.dry_run)
+    return snapshot
@@ -6,7 +6,6 @@ path_folder = __file__.rsplit("/", 1)[0]
 create_env_sh = os.path.join(path_folder, "create_env.sh")
 add_path_sh = os.path.join(path_folder, "add_path_env.sh")
 generate_docs_py = os.path.join(path_folder, "generate_docs.py")
-print(f"Path folder: {create_env_sh}")
 
 LICENSE = """
 Copyright 2025 Deyviss Jesus Oroya Villalta
@@ -18,6 +17,13 @@ The above copyright notice and this permission notice shall be included in all c
 THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+REQUIREMENTS_DEFAULT = ["jupyter", 
+                        "ipykernel", 
+                        "nbconvert", 
+                        "mkdocs",
+                        "mkdocs-material",
+                        "djgit @ git+https://github.com/djoroya/djgit.git"]
+
 def main():
     # --path 
     # --python
@@ -32,17 +38,19 @@ def main():
         help="Python interpreter to use for creating the virtual environment.",
     )
 
+    parser.add_argument(
+        "--template",
+        action="store_true",
+        help="Clone .conda from a cached environment template instead of building it from scratch.",
+    )
+
     args = parser.parse_args()
 
+    print(f"Path folder: {create_env_sh}")
 
     python = args.python
 
-    requirements_default = ["jupyter", 
-                            "ipykernel", 
-                            "nbconvert", 
-                            "mkdocs",
-                            "mkdocs-material"
-                            "djgit @ git+https://github.com/djoroya/djgit.git"]
+    requirements_default = REQUIREMENTS_DEFAULT
     os.system("mkdir -p src")
     # create requirements.txt if not exists
     if not os.path.exists("requirements.txt"):
@@ -88,4 +96,23 @@ def main():
                 "nav:\n"
                 "  - Inicio: index.md\n"
                 "  - Estudios: auto_docs.md\n"
-            )
\ No newline at end of file
+            )
+
+    if args.template:
+        _create_from_template(python)
+
+
+def _create_from_template(python):
+    # .conda clonado de la plantilla + solo los paquetes que faltan
+    import subprocess
+    from djgit.env_template import create_from_template
+    create_from_template(python, REQUIREMENTS_DEFAULT, "requirements.txt", dest=".conda")
+
+    addpath = os.path.join(".conda", "bin", "djgit_addpath")
+    if os.path.exists(addpath):
+        subprocess.run([addpath, "--path", "src"], check=True)
+
+    if not os.path.exists(".gitignore"):
+        with open(".gitignore", "w") as f:
+            f.write(".conda/\n*.pyc\n")
+    print("[OK] Environment ready in .conda (conda activate .conda/)")
@@ -24,10 +24,11 @@ conda activate .conda/
 conda install pip
 
 
-pip install -r requirements.txt
-
 pip install git+https://github.com/djoroya/djgit.git
 
+# lock + ruedas en paralelo desde el wheelhouse local ($DJGIT_WHEELHOUSE)
+djgit_wheels sync -r requirements.txt || pip install -r requirements.txt
+
 mkdir -p src
 djgit_addpath --path src
 
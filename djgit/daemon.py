@@ -0,0 +1,364 @@
+"""
+Resident <code>djgit</code> process that runs commands sent over a Unix socket.
+
+The daemon imports <code>py2md_core</code> (and <code>ruamel.yaml</code>) once and keeps its
+in-process caches warm between <code>djgit docs</code> calls: parsed modules and rendered
+docstrings. Each request
+carries the argv, working directory and a few environment variables of the client
+(<code>CLIENT_ENV</code> and <code>DJGIT_*</code>); requests are run one at a time, with
+stdout/stderr streamed back to the client.
+
+One daemon serves one interpreter: the socket name is derived from
+<code>sys.executable</code>, in <code>$XDG_RUNTIME_DIR</code> (or a private
+<code>djgit-&lt;uid&gt;</code> directory under the temp dir). Client and daemon refuse the
+socket directory unless it is owned by the current user with mode 0700. The daemon
+exits after <code>--idle-timeout</code> seconds without requests.
+
+Example usage:
+```bash
+djgit daemon start --idle-timeout 3600
+djgit daemon status
+djgit daemon stop
+```
+"""
+import io
+import os
+import sys
+
+# El lado cliente solo importa io/os/sys (ya cargados al arrancar el interprete) al cargar el modulo: socket y marshal se importan
+# al conectar, y solo si existe el socket; el resto (argparse, traceback...) es del servidor
+
+IDLE_TIMEOUT = 3600
+START_TIMEOUT = 10
+REQUEST_TIMEOUT = 30
+
+# Variables de entorno que se envian al daemon: las que usan los comandos que ejecuta
+# (HOME para las caches en ~/.cache, locale) y las propias DJGIT_*; nunca el entorno completo
+CLIENT_ENV = ("HOME", "PATH", "LANG", "LC_ALL", "LC_CTYPE", "TZ")
+
+
+def _tempdir():
+    for name in ("TMPDIR", "TEMP", "TMP"):
+        if os.environ.get(name):
+            return os.environ[name]
+    return "/tmp"
+
+
+def socket_path():
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if not base:
+        base = os.path.join(_tempdir(), f"djgit-{os.getuid()}")
+    # crc32 en vez de hashlib: el cliente no debe pagar la importacion de OpenSSL
+    import zlib
+    tag = format(zlib.crc32(sys.executable.encode()), "08x")
+    return os.path.join(base, f"djgit-{tag}.sock")
+
+
+def check_private_dir(path):
+    """
+    Raise <code>PermissionError</code> unless <code>path</code> is a real directory owned by
+    the current user with mode 0700, so no other user can plant a socket in it.
+    """
+    import stat
+
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"{path} is not a directory")
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by uid {st.st_uid}, not {os.getuid()}")
+    if stat.S_IMODE(st.st_mode) != 0o700:
+        raise PermissionError(f"{path} has mode {stat.S_IMODE(st.st_mode):o}, expected 700")
+
+
+def _send(sock, message):
+    import marshal
+    data = marshal.dumps(message)
+    sock.sendall(len(data).to_bytes(4, "big") + data)
+
+
+def _recv(f):
+    """Next message from the binary file <code>f</code>; <code>None</code> at end of stream."""
+    import marshal
+    size = f.read(4)
+    if len(size) < 4:
+        return None
+    data = f.read(int.from_bytes(size, "big"))
+    return marshal.loads(data)
+
+
+def _connect(timeout=None):
+    path = socket_path()
+    if not os.path.exists(path):
+        return None  # sin daemon: no se importa socket
+    try:
+        check_private_dir(os.path.dirname(path))
+    except PermissionError as e:
+        print(f"[WARN] ignoring djgit daemon socket: {e}", file=sys.stderr)
+        return None
+    import socket
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _request(message, timeout=None):
+    """Send <code>message</code> and yield the replies; <code>None</code> if no daemon answers."""
+    sock = _connect(timeout)
+    if sock is None:
+        return None
+
+    def replies():
+        with sock, sock.makefile("rb") as f:
+            _send(sock, message)
+            while True:
+                reply = _recv(f)
+                if reply is None:
+                    return
+                yield reply
+    return replies()
+
+
+# ---------- cliente ----------
+
+def client_env():
+    return {k: v for k, v in os.environ.items() if k in CLIENT_ENV or k.startswith("DJGIT_")}
+
+
+def call(argv):
+    """
+    Run <code>argv</code> (<code>[command, *args]</code>) in the daemon, relaying its
+    output. Returns the exit code, or <code>None</code> if no daemon is running (the
+    caller then runs the command itself).
+    """
+    replies = _request({"argv": list(argv), "cwd": os.getcwd(), "env": client_env()})
+    if replies is None:
+        return None
+    try:
+        for reply in replies:
+            if "exit" in reply:
+                return reply["exit"]
+            stream = sys.stdout if reply["stream"] == "out" else sys.stderr
+            stream.write(reply["data"])
+            stream.flush()
+    except (OSError, ValueError, EOFError):
+        pass
+    # el daemon se cerro a mitad de la peticion
+    print("[ERROR] djgit daemon closed the connection", file=sys.stderr)
+    return 1
+
+
+def ping():
+    """Status dict of the running daemon, or <code>None</code>."""
+    replies = _request({"op": "status"}, timeout=2)
+    if replies is None:
+        return None
+    try:
+        return next(replies)
+    except (OSError, ValueError, EOFError, StopIteration):
+        return None
+
+
+def start(idle_timeout=IDLE_TIMEOUT):
+    import subprocess
+    import time
+
+    status = ping()
+    if status:
+        print(f"[INFO] djgit daemon already running (pid {status['pid']})")
+        return status
+    subprocess.Popen([sys.executable, "-m", "djgit.daemon", "serve", "--idle-timeout", str(idle_timeout)],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        status = ping()
+        if status:
+            print(f"[OK] djgit daemon started (pid {status['pid']}) on {socket_path()}")
+            return status
+        time.sleep(0.05)
+    raise RuntimeError(f"djgit daemon did not start within {START_TIMEOUT}s")
+
+
+def stop():
+    replies = _request({"op": "stop"}, timeout=5)
+    if replies is None:
+        print("[INFO] djgit daemon is not running")
+        return False
+    for _ in replies:
+        pass
+    print("[OK] djgit daemon stopped")
+    return True
+
+
+# ---------- servidor ----------
+
+class _StreamWriter(io.TextIOBase):
+    """Text stream that forwards every write to the client as a length-prefixed marshal frame (see <code>_send</code>)."""
+
+    def __init__(self, sock, stream):
+        self.sock = sock
+        self.stream = stream
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if data:
+            _send(self.sock, {"stream": self.stream, "data": data})
+        return len(data)
+
+
+def _client_context(cwd, env):
+    import contextlib
+
+    @contextlib.contextmanager
+    def context():
+        # solo se sustituyen las variables que envia el cliente (CLIENT_ENV, DJGIT_*)
+        keys = {k for k in os.environ if k in CLIENT_ENV or k.startswith("DJGIT_")} | set(env)
+        saved_cwd = os.getcwd()
+        saved_env = {k: os.environ.get(k) for k in keys}
+        for k in keys:
+            if k in env:
+                os.environ[k] = env[k]
+            else:
+                os.environ.pop(k, None)
+        os.chdir(cwd)
+        try:
+            yield
+        finally:
+            os.chdir(saved_cwd)
+            for k, v in saved_env.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+    return context()
+
+
+def _exit_code(exc):
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code, file=sys.stderr)
+    return 1
+
+
+def _run_request(sock, request):
+    import contextlib
+    import traceback
+    from djgit import cli
+
+    command, args = request["argv"][0], request["argv"][1:]
+    out, err = _StreamWriter(sock, "out"), _StreamWriter(sock, "err")
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        if command not in cli.DAEMON_COMMANDS:
+            print(f"djgit daemon: '{command}' must run in the client", file=sys.stderr)
+            return 2
+        try:
+            with _client_context(request["cwd"], request["env"]):
+                cli.run(command, args)
+            return 0
+        except SystemExit as exc:
+            return _exit_code(exc)
+        except Exception:
+            traceback.print_exc()
+            return 1
+
+
+def _warm_up():
+    # los imports y las caches que justifican el daemon
+    from djgit import cli, py2md_core, py2md_docs  # noqa: F401
+    try:
+        import ruamel.yaml  # noqa: F401
+    except ImportError:
+        pass
+
+
+def serve(idle_timeout=IDLE_TIMEOUT):
+    import socket
+    import time
+
+    path = socket_path()
+    if ping():
+        raise RuntimeError(f"A djgit daemon is already listening on {path}")
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    # el directorio puede existir ya: si lo creo otro usuario, no se usa
+    check_private_dir(os.path.dirname(path))
+    if os.path.exists(path):
+        os.remove(path)  # socket de un daemon que ya no existe
+
+    _warm_up()
+    started = time.time()
+    served = 0
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(old_umask)
+    server.listen()
+    server.settimeout(idle_timeout)
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                break
+            # un cliente que no envia (o no lee) no bloquea al servidor
+            conn.settimeout(REQUEST_TIMEOUT)
+            with conn, conn.makefile("rb") as f:
+                try:
+                    request = _recv(f) or {}
+                    op = request.get("op")
+                    if op == "status":
+                        _send(conn, {"pid": os.getpid(), "python": sys.executable,
+                                     "uptime": time.time() - started, "served": served})
+                    elif op == "stop":
+                        _send(conn, {"stopped": True})
+                        break
+                    elif "argv" in request:
+                        served += 1
+                        _send(conn, {"exit": _run_request(conn, request)})
+                except (OSError, ValueError, EOFError, TypeError):
+                    pass  # cliente desconectado, lento o peticion invalida
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="djgit daemon",
+                                     description="Resident process that runs djgit commands with warm caches.")
+    parser.add_argument("action", choices=["start", "stop", "status", "serve"],
+                        help="start: launch in background; serve: run in foreground")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="Seconds without requests before the daemon exits")
+    args = parser.parse_args(argv)
+
+    if args.action == "start":
+        start(args.idle_timeout)
+    elif args.action == "stop":
+        stop()
+    elif args.action == "serve":
+        serve(args.idle_timeout)
+    else:
+        status = ping()
+        if status is None:
+            print("[INFO] djgit daemon is not running")
+            sys.exit(1)
+        print(f"[OK] pid {status['pid']}, {status['python']}, "
+              f"up {status['uptime']:.0f}s, {status['served']} requests served")
+
+
+if __name__ == "__main__":
+    main()
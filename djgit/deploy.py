@@ -1,17 +1,31 @@
+import asyncio
 import os
 import shutil
-from .tools import get_repo_name, list_remote_branches, create_deploy_branch, clonar_deploy_branch,createsetup
+from .tools import RemoteInfo, create_deploy_branch, clonar_deploy_branch,createsetup
+from .pipeline import run_pipeline
+from . import tracing
 
 # ============== Main ===================
-def deploy(target_folder,package_data={}):
+def deploy(target_folder,package_data={},pipeline=False,trace=None,bytecode=None):
+
+    # trace: fichero .json (Chrome trace) o .jsonl con los tiempos de cada etapa
+    if trace:
+        tracing.enable(trace)
+
+    if pipeline:
+        # etapas remotas y locales en paralelo, con informe de tiempos
+        return asyncio.run(deploy_pipeline(target_folder, package_data=package_data, bytecode=bytecode))
 
     folder_exists = os.path.exists('.repo_deploy')
     if not folder_exists:
         os.makedirs('.repo_deploy')
 
 
-    repo_url,name = get_repo_name()
-    remote_branches = list_remote_branches(repo_url)
+    # url, ramas y sha de deploy en una sola consulta (cacheada en .git)
+    with tracing.stage("remote query"):
+        remote = RemoteInfo.for_repo()
+    repo_url,name = remote.url, remote.name
+    remote_branches = remote.branches
     print("Ramas remotas:", remote_branches)
 
     if not "deploy" in remote_branches:
@@ -28,7 +42,8 @@ def deploy(target_folder,package_data={}):
     if not ".git" in listdir:
         print("Clonando la rama 'deploy' del repositorio remoto")
         #
-        clonar_deploy_branch(repo_url)
+        with tracing.stage("clone"):
+            clonar_deploy_branch(repo_url)
         # remove .repo_deploy/*  remove all files in .repo_deploy except file initialized by .
         shutil.rmtree('.repo_deploy/scripts', ignore_errors=True)
         shutil.rmtree('.repo_deploy/src', ignore_errors=True)
@@ -36,28 +51,92 @@ def deploy(target_folder,package_data={}):
         print("La rama 'deploy' ya ha sido clonada")
 
 
-    copyfiles = ["README.md", "LICENSE", ".gitignore","requirements.txt"]
-    for file in copyfiles:
-        shutil.copy(file, os.path.join(".repo_deploy", file))
+    with tracing.stage("copy") as span:
+        copyfiles = ["README.md", "LICENSE", ".gitignore","requirements.txt"]
+        for file in copyfiles:
+            tracing.copy(file, os.path.join(".repo_deploy", file), span)
+
+        # copy src/* to .repo_deploy/name of the repo
+        folder_name = os.path.join('.repo_deploy', name)
+        if os.path.exists(folder_name):
+            shutil.rmtree(folder_name)
 
-    # copy src/* to .repo_deploy/name of the repo
-    folder_name = os.path.join('.repo_deploy', name)
-    if os.path.exists(folder_name):
-        shutil.rmtree(folder_name)
+        tracing.copytree(target_folder, folder_name, span)
 
-    shutil.copytree(target_folder, folder_name)
+    # bytecode: "checked" / "unchecked" -> .pyc con hash precompilados en el paquete
+    if bytecode:
+        package_data = _compile_bytecode('.repo_deploy', name, package_data, bytecode)
 
     os.chdir('.repo_deploy')
-    createsetup(name,package_data=package_data)
+    with tracing.stage("setup generation"):
+        createsetup(name,package_data=package_data)
 
 
     # if exists build, dist and .egg-info remove
-    if os.path.exists('build'):
-        shutil.rmtree('build')
-    if os.path.exists('dist'):
-        shutil.rmtree('dist')
-    if os.path.exists(name+".egg-info"):
-        shutil.rmtree(name+".egg-info")
-
-    os.system('python setup.py sdist')
-    os.system('python setup.py bdist_wheel')
+    _clean_build(name)
+
+    with tracing.stage("build", target="sdist"):
+        os.system('python setup.py sdist')
+    with tracing.stage("build", target="bdist_wheel"):
+        os.system('python setup.py bdist_wheel')
+
+
+
+def _compile_bytecode(root, name, package_data, mode):
+    import sys
+    from .bytecode import PYC_CACHE, compile_bytecode, merge_package_data, pyc_package_data, unignore_pycache
+
+    with tracing.stage("bytecode", mode=mode) as span:
+        stats = compile_bytecode(os.path.join(root, name), cache_dir=os.path.abspath(PYC_CACHE), mode=mode)
+        span.add(files=stats["compiled"] + stats["reused"])
+    print(f"Bytecode ({mode}): {stats['compiled']} compilados, {stats['reused']} sin cambios "
+          f"(solo validos para {sys.implementation.cache_tag}; instalar con 'pip install --no-compile')")
+    for file, error in stats["failed"]:
+        print(f"[WARN] No se pudo compilar {file}: {error}")
+    # el .gitignore copiado del proyecto excluye *.pyc: sin esto no llegan a la rama deploy
+    unignore_pycache(os.path.join(root, name))
+    return merge_package_data(package_data, pyc_package_data(root, name))
+
+
+# ============== Pipeline ===================
+def _stage_local(target_folder, package_data, stage_dir, name, bytecode=None):
+    with tracing.stage("copy") as span:
+        copyfiles = ["README.md", "LICENSE", ".gitignore","requirements.txt"]
+        for file in copyfiles:
+            tracing.copy(file, os.path.join(stage_dir, file), span)
+        tracing.copytree(target_folder, os.path.join(stage_dir, name), span)
+    if bytecode:
+        package_data = _compile_bytecode(stage_dir, name, package_data, bytecode)
+    with tracing.stage("setup generation"):
+        createsetup(name, package_data=package_data, target_path=stage_dir)
+
+
+def _clean_build(name):
+    for folder in ['build', 'dist', name+".egg-info"]:
+        if os.path.exists(folder):
+            shutil.rmtree(folder)
+
+
+def _build_target(target):
+    with tracing.stage("build", target=target):
+        return os.system(f'python setup.py {target}')
+
+
+async def _build(name, timer):
+    await timer.run("clean", _clean_build, name)
+    await timer.run("sdist", _build_target, "sdist")
+    await timer.run("bdist_wheel", _build_target, "bdist_wheel")
+
+
+async def deploy_pipeline(target_folder, package_data={}, bytecode=None):
+    """
+    Same result as <code>deploy()</code>, but the remote ref listing and clone of the
+    'deploy' branch run while the local tree is copied and <code>setup.py</code> is
+    generated in a staging folder. Prints a per-stage timing report at the end.
+    """
+    def stage_local(stage_dir, name):
+        _stage_local(target_folder, package_data, stage_dir, name, bytecode)
+
+    timer = await run_pipeline(stage_local, _build)
+    timer.report()
+    return timer
@@ -0,0 +1,151 @@
+"""
+Content-addressed conda environment templates for <code>djgit_create_env --template</code>.
+
+A template is a conda prefix built once per (python version, base requirements) pair under
+<code>$DJGIT_ENV_TEMPLATES</code> (default <code>~/.djgit/env_templates/&lt;hash&gt;</code>).
+New projects get a <code>conda create --clone</code> of it, which hardlinks the package
+files and rewrites the prefix, so <code>.conda</code> is ready in seconds. The cloned
+environment is then checked against <code>requirements.txt</code> and only the missing
+or mismatching packages are installed with pip.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+
+TEMPLATE_ROOT = os.environ.get("DJGIT_ENV_TEMPLATES",
+                               os.path.join(os.path.expanduser("~"), ".djgit", "env_templates"))
+MANIFEST = "djgit-template.json"
+
+
+def read_requirements(path="requirements.txt"):
+    """Requirement lines of <code>path</code> without comments and blank lines."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        lines = [line.split(" #", 1)[0].strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def _canonical(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _parse(req):
+    # "pkg[extra]==1.0 ; marker" -> ("pkg", "1.0"); "pkg @ git+..." -> ("pkg", None)
+    m = re.match(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)", req)
+    if not m:
+        return None, None
+    pin = re.search(r"==\s*([^\s,;]+)", req)
+    return _canonical(m.group(1)), (pin.group(1) if pin else None)
+
+
+def template_key(python, requirements):
+    """Hash of the python version and the sorted requirement lines."""
+    h = hashlib.sha256()
+    h.update(f"python={python}\n".encode())
+    for req in sorted(requirements):
+        h.update((req + "\n").encode())
+    return h.hexdigest()[:16]
+
+
+def _python(prefix):
+    return os.path.join(prefix, "bin", "python")
+
+
+def installed_packages(prefix):
+    """<code>{canonical name: version}</code> of the packages pip sees in <code>prefix</code>."""
+    out = subprocess.run([_python(prefix), "-m", "pip", "list", "--format=json"],
+                         stdout=subprocess.PIPE, text=True, check=True).stdout
+    return {_canonical(p["name"]): p["version"] for p in json.loads(out)}
+
+
+def missing_requirements(prefix, requirements):
+    """Requirement lines not satisfied by the packages installed in <code>prefix</code>."""
+    installed = installed_packages(prefix)
+    missing = []
+    for req in requirements:
+        name, pin = _parse(req)
+        if name is None:
+            continue
+        version = installed.get(name)
+        if version is None or (pin is not None and version != pin):
+            missing.append(req)
+    return missing
+
+
+def build_template(python, requirements):
+    """Return the template prefix for this python/requirements pair, building it if needed."""
+    prefix = os.path.join(TEMPLATE_ROOT, template_key(python, requirements))
+    if os.path.exists(os.path.join(prefix, MANIFEST)):
+        print(f"Using environment template {prefix}")
+        return prefix
+
+    print(f"Building environment template {prefix}")
+    # restos de una construccion interrumpida (sin manifest)
+    shutil.rmtree(prefix, ignore_errors=True)
+    os.makedirs(TEMPLATE_ROOT, exist_ok=True)
+    subprocess.run(["conda", "create", "-y", "-p", prefix, f"python={python}", "pip"], check=True)
+    if requirements:
+        subprocess.run([_python(prefix), "-m", "pip", "install", *requirements], check=True)
+
+    # el manifest marca la plantilla como completa
+    with open(os.path.join(prefix, MANIFEST), "w") as f:
+        json.dump({"python": python,
+                   "requirements": requirements,
+                   "packages": installed_packages(prefix)}, f, indent=2)
+    return prefix
+
+
+def clone_template(template, dest=".conda"):
+    """Clone <code>template</code> into <code>dest</code> (hardlinked, prefix rewritten by conda)."""
+    subprocess.run(["conda", "create", "-y", "-p", dest, "--clone", template], check=True)
+    return os.path.abspath(dest)
+
+
+def create_from_template(python, base_requirements, requirements_path="requirements.txt", dest=".conda"):
+    """
+        Creates <code>dest</code> from the cached template, installing only the requirements
+        the template does not already satisfy.
+<table>
+  <thead>
+    <tr>
+      <th>Section</th>
+      <th>Description</th>
+    </tr>
+  </thead>
+  <tbody>
+    <tr>
+      <td><strong>Inputs</strong></td>
+      <td>
+        <code>python</code> (<em>str</em>): Python version of the environment (e.g. <code>3.9</code>).<br>
+        <code>base_requirements</code> (<em>list</em>): Packages baked into the shared template.<br>
+        <code>requirements_path</code> (<em>str</em>): Requirements file of the project.<br>
+        <code>dest</code> (<em>str</em>): Prefix to create (default <code>.conda</code>).
+      </td>
+    </tr>
+    <tr>
+      <td><strong>Outputs</strong></td>
+      <td>
+        <em>list</em>: Requirement lines installed on top of the template.
+      </td>
+    </tr>
+  </tbody>
+</table>
+"""
+    if os.path.exists(dest):
+        raise FileExistsError(f"{dest} already exists; remove it to create a new environment")
+
+    requirements = read_requirements(requirements_path)
+    template = build_template(python, base_requirements)
+    prefix = clone_template(template, dest)
+
+    missing = missing_requirements(prefix, requirements)
+    if missing:
+        print("Installing missing requirements:", missing)
+        subprocess.run([_python(prefix), "-m", "pip", "install", *missing], check=True)
+    else:
+        print("[OK] Environment matches requirements.txt")
+    return missing
@@ -0,0 +1,161 @@
+"""
+Shared file hashing for change detection (copylibs snapshots, staging, babel builds).
+
+- Files of at least <code>MMAP_THRESHOLD</code> bytes are hashed through
+  <code>mmap</code>, one task per file; smaller files are read whole and hashed in
+  batches, so the thread pool is not flooded with tiny tasks. <code>hashlib</code>
+  releases the GIL while hashing, so the threads run in parallel.
+- <code>HashCache</code> keeps <code>path → (inode, size, mtime_ns, digest)</code> in a JSON
+  file: a file whose stat still matches is never read again. Files modified in the
+  last <code>RACY_SECONDS</code> are not cached, since a second write within the same
+  mtime tick would go unnoticed.
+
+Example usage:
+```python
+cache = HashCache(".djgit-hashcache.json")
+digests = hash_files(paths, cache=cache)
+cache.save()
+```
+"""
+import hashlib
+import json
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ALGORITHM = "sha256"
+MMAP_THRESHOLD = 1 << 20
+BATCH_FILES = 256
+BATCH_BYTES = 8 << 20
+CHUNK = 8 << 20
+RACY_SECONDS = 2
+
+
+def _hash_small(path):
+    with open(path, "rb") as f:
+        return hashlib.new(ALGORITHM, f.read()).hexdigest()
+
+
+def _hash_mmap(path):
+    h = hashlib.new(ALGORITHM)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return h.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m, memoryview(m) as view:
+            for start in range(0, len(view), CHUNK):
+                h.update(view[start:start + CHUNK])
+    return h.hexdigest()
+
+
+def hash_file(path, size=None):
+    """Hex digest of one file, through <code>mmap</code> if it is large."""
+    size = os.stat(path).st_size if size is None else size
+    return _hash_mmap(path) if size >= MMAP_THRESHOLD else _hash_small(path)
+
+
+class HashCache:
+    """Persistent stat-keyed digest cache stored as JSON in <code>path</code> (memory only if <code>None</code>)."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                if data.get("algorithm") == ALGORITHM:
+                    self.entries = data["files"]
+            except (OSError, ValueError, KeyError):
+                self.entries = {}
+
+    def lookup(self, path, st):
+        entry = self.entries.get(os.path.abspath(path))
+        if entry and entry[:3] == [st.st_ino, st.st_size, st.st_mtime_ns]:
+            self.hits += 1
+            return entry[3]
+        self.misses += 1
+        return None
+
+    def store(self, path, st, digest):
+        if time.time() - st.st_mtime < RACY_SECONDS:
+            return
+        self.entries[os.path.abspath(path)] = [st.st_ino, st.st_size, st.st_mtime_ns, digest]
+        self._dirty = True
+
+    def prune(self, keep):
+        """Forget every path not in <code>keep</code>."""
+        keep = {os.path.abspath(p) for p in keep}
+        for path in [p for p in self.entries if p not in keep]:
+            del self.entries[path]
+            self._dirty = True
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"algorithm": ALGORITHM, "files": self.entries}, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError:
+            pass  # la cache es solo una optimizacion
+
+
+def _batches(small):
+    batch, size = [], 0
+    for path, st in small:
+        batch.append((path, st))
+        size += st.st_size
+        if len(batch) >= BATCH_FILES or size >= BATCH_BYTES:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def hash_files(paths, cache=None, workers=None):
+    """
+    <code>{path: digest}</code> for every file in <code>paths</code>. Files whose stat
+    matches <code>cache</code> are not read; the rest are hashed in a thread pool.
+    """
+    result, small, large = {}, [], []
+    for path in paths:
+        st = os.stat(path)
+        digest = cache.lookup(path, st) if cache is not None else None
+        if digest is not None:
+            result[path] = digest
+        elif st.st_size >= MMAP_THRESHOLD:
+            large.append((path, st))
+        else:
+            small.append((path, st))
+
+    def run_batch(batch):
+        return [(path, st, _hash_small(path)) for path, st in batch]
+
+    def run_large(item):
+        path, st = item
+        return [(path, st, _hash_mmap(path))]
+
+    tasks = [(run_large, item) for item in large] + [(run_batch, b) for b in _batches(small)]
+    if len(tasks) <= 1 or workers == 1:
+        done = [func(arg) for func, arg in tasks]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            done = list(pool.map(lambda task: task[0](task[1]), tasks))
+
+    for group in done:
+        for path, st, digest in group:
+            result[path] = digest
+            if cache is not None:
+                cache.store(path, st, digest)
+    return result
+
+
+def digest(path, cache=None):
+    """Digest of a single file, using <code>cache</code> when it is still valid."""
+    return hash_files([path], cache=cache, workers=1)[path]
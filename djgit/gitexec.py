@@ -0,0 +1,170 @@
+import asyncio
+import atexit
+import os
+import subprocess
+import threading
+
+
+class GitError(RuntimeError):
+    """Raised by <code>GitResult.check()</code> when a git command exits with a non-zero status."""
+
+    def __init__(self, result):
+        self.result = result
+        super().__init__(
+            f"git {' '.join(result.args)} failed ({result.returncode}): {result.stderr.strip()}"
+        )
+
+
+class GitResult:
+    """Return code and captured output of a single git invocation."""
+
+    def __init__(self, args, returncode, stdout, stderr):
+        self.args = list(args)
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+
+    @property
+    def ok(self):
+        return self.returncode == 0
+
+    def lines(self):
+        return self.stdout.splitlines()
+
+    def check(self):
+        if not self.ok:
+            raise GitError(self)
+        return self
+
+    def __repr__(self):
+        return f"GitResult(args={self.args!r}, returncode={self.returncode})"
+
+
+def run_git(args, cwd=None, check=False, timeout=None, input=None):
+    """
+    Run <code>git *args</code> without a shell and return a <code>GitResult</code>.
+    With <code>check=True</code> a non-zero exit status raises <code>GitError</code>.
+
+    Example usage:
+    ```python
+    res = run_git(["ls-remote", "--heads", url], check=True)
+    ```
+    """
+    proc = subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        input=input,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        timeout=timeout,
+    )
+    result = GitResult(args, proc.returncode, proc.stdout, proc.stderr)
+    return result.check() if check else result
+
+
+async def run_git_async(args, cwd=None, check=False, timeout=None):
+    """Asyncio version of <code>run_git</code>; several calls can be awaited concurrently."""
+    proc = await asyncio.create_subprocess_exec(
+        "git", *args,
+        cwd=cwd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    result = GitResult(args, proc.returncode, stdout.decode(), stderr.decode())
+    return result.check() if check else result
+
+
+class CatFileBatch:
+    """
+    Long-lived <code>git cat-file --batch</code> process for repeated object and
+    ref lookups in a local repository, so each query costs a pipe round trip
+    instead of a fork/exec. Safe to share between threads.
+
+    Example usage:
+    ```python
+    with CatFileBatch() as batch:
+        sha = batch.resolve("refs/heads/deploy")
+        kind, data = batch.read(sha + ":setup.py")
+    ```
+    """
+
+    def __init__(self, cwd=None):
+        self.cwd = cwd
+        self._lock = threading.Lock()
+        self._proc = None
+
+    def _start(self):
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                ["git", "cat-file", "--batch"],
+                cwd=self.cwd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self._proc
+
+    def _query(self, obj):
+        # Devuelve (sha, tipo, contenido) o None si el objeto no existe
+        with self._lock:
+            proc = self._start()
+            proc.stdin.write(obj.encode() + b"\n")
+            proc.stdin.flush()
+            header = proc.stdout.readline().decode().rstrip("\n")
+            if not header or header.endswith(" missing") or header.endswith(" ambiguous"):
+                return None
+            sha, kind, size = header.split()
+            data = proc.stdout.read(int(size))
+            proc.stdout.read(1)  # salto de linea final
+            return sha, kind, data
+
+    def resolve(self, rev):
+        """SHA of <code>rev</code> (ref name, short sha, <code>rev:path</code>...) or None."""
+        res = self._query(rev)
+        return res[0] if res else None
+
+    def read(self, rev):
+        """<code>(type, bytes)</code> of the object named by <code>rev</code>, or None."""
+        res = self._query(rev)
+        return (res[1], res[2]) if res else None
+
+    def close(self):
+        with self._lock:
+            if self._proc is not None:
+                if self._proc.poll() is None:
+                    self._proc.stdin.close()
+                    self._proc.wait()
+                self._proc = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_batches = {}
+_batches_lock = threading.Lock()
+
+
+def get_batch(cwd=None):
+    """Shared <code>CatFileBatch</code> for the repository at <code>cwd</code>, closed at exit."""
+    key = os.path.abspath(cwd or ".")
+    with _batches_lock:
+        batch = _batches.get(key)
+        if batch is None:
+            batch = _batches[key] = CatFileBatch(key)
+        return batch
+
+
+@atexit.register
+def _close_batches():
+    for batch in list(_batches.values()):
+        batch.close()
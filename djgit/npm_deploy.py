@@ -1,7 +1,29 @@
 import os,shutil
-from djgit.tools import get_repo_name, list_remote_branches,create_deploy_branch,clonar_deploy_branch
+import asyncio
+import hashlib
+import subprocess
+from djgit.tools import RemoteInfo,create_deploy_branch,clonar_deploy_branch
+from djgit.pipeline import run_pipeline
+from djgit import tracing
+from djgit import babel_build
+from djgit.staging import stage_tree
 import json
 
+BABEL = {
+    "presets": [
+        "@babel/preset-env",
+        "@babel/preset-react"
+    ]
+}
+BABEL_DEV = ["@babel/preset-react",
+             "@babel/preset-env",
+             "@babel/cli",
+             "@babel/core"]
+PEER = ["react", "react-dom"]
+
+# hash del package-lock.json con el que se instalo node_modules
+LOCK_STAMP = os.path.join("node_modules", ".djgit-lock-hash")
+
 def create_package_json(path,repo_name,target_path=".repo_deploy"):
 
 
@@ -19,20 +41,118 @@ def create_package_json(path,repo_name,target_path=".repo_deploy"):
     package_json["author"] = "Deyviss Jesus Oroya Villalta"
     package_json["license"] = "MIT"
 
+    # dependencias declaradas aqui para una unica instalacion desde el lockfile
+    peer = package_json.setdefault("peerDependencies", {})
+    for pkg in PEER:
+        peer.setdefault(pkg, "*")
+    dev = package_json.setdefault("devDependencies", {})
+    for pkg in BABEL_DEV:
+        dev.setdefault(pkg, "*")
+
     with open(os.path.join(target_path,"package.json"), "w") as f:
         json.dump(package_json, f, indent=4)
     print(package_json)
 
 
-def npm_deploy():
+def _lock_is_current(path="."):
+    # el lockfile vale si declara las mismas dependencias que package.json
+    lock_path = os.path.join(path, "package-lock.json")
+    if not os.path.exists(lock_path):
+        return False
+    with open(os.path.join(path, "package.json")) as f:
+        package_json = json.load(f)
+    with open(lock_path) as f:
+        root = json.load(f).get("packages", {}).get("", {})
+    for key in ["dependencies", "devDependencies", "peerDependencies"]:
+        if package_json.get(key, {}) != root.get(key, {}):
+            return False
+    return True
+
+
+def npm_install(path=".", cache_dir=None, offline=False):
+    """
+        Installs the dependencies declared in <code>package.json</code> with a single
+        <code>npm ci</code> driven by <code>package-lock.json</code>. The lockfile is
+        generated (<code>npm install --package-lock-only</code>) when missing or out of date,
+        and the install is skipped when <code>node_modules</code> was already built from a
+        lockfile with the same hash.
+<table>
+  <thead>
+    <tr>
+      <th>Section</th>
+      <th>Description</th>
+    </tr>
+  </thead>
+  <tbody>
+    <tr>
+      <td><strong>Inputs</strong></td>
+      <td>
+        <code>path</code> (<em>str</em>): Folder containing <code>package.json</code>.<br>
+        <code>cache_dir</code> (<em>str</em>): Shared npm cache (defaults to <code>$DJGIT_NPM_CACHE</code>); used with <code>--prefer-offline</code>.<br>
+        <code>offline</code> (<em>bool</em>): Install only from the cache (<code>--offline</code>, or <code>DJGIT_NPM_OFFLINE=1</code>).
+      </td>
+    </tr>
+    <tr>
+      <td><strong>Outputs</strong></td>
+      <td>
+        <em>bool</em>: <code>True</code> if npm ran, <code>False</code> if the install was skipped.
+      </td>
+    </tr>
+  </tbody>
+</table>
+"""
+    cache_dir = cache_dir or os.environ.get("DJGIT_NPM_CACHE")
+    offline = offline or os.environ.get("DJGIT_NPM_OFFLINE") == "1"
+
+    flags = []
+    if cache_dir:
+        flags += ["--cache", os.path.abspath(os.path.expanduser(cache_dir))]
+        flags.append("--offline" if offline else "--prefer-offline")
+    elif offline:
+        flags.append("--offline")
+
+    if not _lock_is_current(path):
+        print("Generando package-lock.json")
+        subprocess.run(["npm", "install", "--package-lock-only", *flags], cwd=path, check=True)
+
+    with open(os.path.join(path, "package-lock.json"), "rb") as f:
+        lock_hash = hashlib.sha256(f.read()).hexdigest()
+
+    stamp = os.path.join(path, LOCK_STAMP)
+    if os.path.exists(stamp):
+        with open(stamp) as f:
+            if f.read().strip() == lock_hash:
+                print("node_modules ya esta al dia con package-lock.json")
+                return False
+
+    subprocess.run(["npm", "ci", *flags], cwd=path, check=True)
+    os.makedirs(os.path.dirname(stamp), exist_ok=True)
+    with open(stamp, "w") as f:
+        f.write(lock_hash)
+    return True
+
+
+def npm_deploy(pipeline=False,trace=None,npm_cache=None,offline=False,incremental=False,staging="copy"):
+
+    # trace: fichero .json (Chrome trace) o .jsonl con los tiempos de cada etapa
+    if trace:
+        tracing.enable(trace)
+
+    if pipeline:
+        # etapas remotas y locales en paralelo, con informe de tiempos
+        return asyncio.run(npm_deploy_pipeline(npm_cache=npm_cache, offline=offline,
+                                               incremental=incremental, staging=staging))
 
     folder_exists = os.path.exists('.repo_deploy')
     if not folder_exists:
         os.makedirs('.repo_deploy')
 
 
-    repo_url,name = get_repo_name()
-    remote_branches = list_remote_branches(repo_url)
+    # url, ramas y sha de deploy en una sola consulta (cacheada en .git)
+    with tracing.stage("remote query"):
+        remote = RemoteInfo.for_repo()
+    repo_url,name = remote.url, remote.name
+    remote_branches = remote.branches
     print("Ramas remotas:", remote_branches)
 
     if not "deploy" in remote_branches:
@@ -49,7 +169,8 @@ def npm_deploy():
     if not ".git" in listdir:
         print("Clonando la rama 'deploy' del repositorio remoto")
         #
-        clonar_deploy_branch(repo_url)
+        with tracing.stage("clone"):
+            clonar_deploy_branch(repo_url)
         # remove .repo_deploy/*  remove all files in .repo_deploy except file initialized by .
         shutil.rmtree('.repo_deploy/scripts', ignore_errors=True)
         shutil.rmtree('.repo_deploy/src', ignore_errors=True)
@@ -62,38 +183,77 @@ def npm_deploy():
     # create .babelrc
 
 
-    babel = {
-    "presets": [
-        "@babel/preset-env",
-        "@babel/preset-react"
-    ]
-    }
-
     with open(os.path.join(".repo_deploy",".babelrc"), "w") as f:
-        json.dump(babel, f, indent=4)
-
-    copyfiles = ["README.md", "LICENSE", ".gitignore"]
+        json.dump(BABEL, f, indent=4)
 
-    for file in copyfiles:
-        shutil.copy(file, os.path.join(".repo_deploy", file))
+    with tracing.stage("copy") as span:
+        copyfiles = ["README.md", "LICENSE", ".gitignore"]
 
+        for file in copyfiles:
+            tracing.copy(file, os.path.join(".repo_deploy", file), span)
 
-    # copy all src/dependencies to .repo_deploy/src
 
-    # create src folder in .repo_deploy if not exists
-    if os.path.exists(os.path.join(".repo_deploy","src")):
-        shutil.rmtree(os.path.join(".repo_deploy","src"))
-
-    # cp -r src/dependencies/* .repo_deploy/src/.
-    shutil.copytree(os.path.join("src","dependencies"),
-                    os.path.join(".repo_deploy","src"))
+        # copy all src/dependencies to .repo_deploy/src
+        _stage_src(os.path.join(".repo_deploy","src"), span, staging)
 
     os.chdir('.repo_deploy')
     os.system("pwd")
-    os.system('npm install react react-dom --save-peer')
-    babel_dev = ["@babel/preset-react", 
-                "@babel/preset-env", 
-                "@babel/cli", 
-                "@babel/core"]
-    os.system('npm install ' + ' '.join(babel_dev) + ' --save-dev')
-    os.system('npm run build')
+    _npm_install(npm_cache, offline)
+    _babel(incremental)
+
+
+def _stage_src(target, span, staging="copy"):
+    if staging == "copy":
+        # create src folder in .repo_deploy if not exists
+        if os.path.exists(target):
+            shutil.rmtree(target)
+
+        # cp -r src/dependencies/* .repo_deploy/src/.
+        tracing.copytree(os.path.join("src","dependencies"), target, span)
+    else:
+        # hardlinks/reflinks de los ficheros sin cambios; copia si no es posible
+        stats = stage_tree(os.path.join("src","dependencies"), target, mode=staging)
+        print("Staging src:", stats)
+        span.add(files=stats["linked"] + stats["reflinked"] + stats["copied"])
+
+
+def _npm_install(npm_cache=None, offline=False):
+    with tracing.stage("npm install"):
+        return npm_install(".", cache_dir=npm_cache, offline=offline)
+
+
+def _babel(incremental=False):
+    with tracing.stage("babel", incremental=incremental):
+        if incremental:
+            # solo los ficheros cuyo fuente o .babelrc han cambiado
+            return babel_build.build(".")
+        return os.system('npm run build')
+
+
+# ============== Pipeline ===================
+def _stage_local(stage_dir, name, staging="copy"):
+    create_package_json("package.json", name, target_path=stage_dir)
+    with open(os.path.join(stage_dir, ".babelrc"), "w") as f:
+        json.dump(BABEL, f, indent=4)
+    with tracing.stage("copy") as span:
+        for file in ["README.md", "LICENSE", ".gitignore"]:
+            tracing.copy(file, os.path.join(stage_dir, file), span)
+        _stage_src(os.path.join(stage_dir, "src"), span, staging)
+
+
+async def npm_deploy_pipeline(npm_cache=None, offline=False, incremental=False, staging="copy"):
+    """
+    Same result as <code>npm_deploy()</code>, but the remote ref listing and clone of
+    the 'deploy' branch run while <code>package.json</code>, <code>.babelrc</code> and
+    <code>src/dependencies</code> are staged. Prints a per-stage timing report at the end.
+    """
+    async def build(name, timer):
+        await timer.run("npm install", _npm_install, npm_cache, offline)
+        await timer.run("babel", _babel, incremental)
+
+    def stage_local(stage_dir, name):
+        _stage_local(stage_dir, name, staging)
+
+    timer = await run_pipeline(stage_local, build)
+    timer.report()
+    return timer
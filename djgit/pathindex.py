@@ -0,0 +1,187 @@
+"""
+Prebuilt module index for the directories managed by <code>addpath</code>.
+
+With the index enabled (<code>djgit_addpath --index on</code>), two files are written next to
+<code>conda.pth</code>:
+
+- <code>_djgit_pathindex.py</code>: a self-contained meta-path finder with the map
+  <code>{top-level module: (location, kind)}</code> of every managed directory embedded as a literal.
+- <code>djgit_pathindex.pth</code>: runs after <code>conda.pth</code> at interpreter startup,
+  removes the managed directories from <code>sys.path</code> and appends the finder to
+  <code>sys.meta_path</code>.
+
+Imports that reach the managed directories then cost a dict lookup instead of a
+<code>stat</code>/<code>listdir</code> per directory. The finder goes last in
+<code>sys.meta_path</code>, so the standard library and site-packages keep their precedence,
+and names resolve as with <code>PathFinder</code>: the first managed directory with a
+regular module or package wins over namespace portions, and a namespace package spans
+every managed directory that has a portion of it. Directories whose mtime
+changed since the index was built are rescanned once at startup and on
+<code>importlib.invalidate_caches()</code>. The index is rebuilt whenever
+<code>djgit_addpath</code> changes <code>conda.pth</code>.
+"""
+import os
+
+from .addpath import PTH_NAME, _write_atomic, find_site_packages, read_pth
+
+MODULE_NAME = "_djgit_pathindex"
+PTH_FILE = "djgit_pathindex.pth"
+
+# Codigo del modulo generado; INDEX y DIRS se sustituyen al escribirlo
+RUNTIME = '''"""Generated by djgit.pathindex -- do not edit."""
+import os
+import sys
+from importlib.machinery import BYTECODE_SUFFIXES, EXTENSION_SUFFIXES, SOURCE_SUFFIXES, ModuleSpec
+from importlib.util import spec_from_file_location
+
+INDEX = {index!r}
+DIRS = {dirs!r}
+
+# orden de preferencia de FileFinder dentro de un directorio
+_ORDER = list(EXTENSION_SUFFIXES) + list(SOURCE_SUFFIXES) + list(BYTECODE_SUFFIXES)
+# para extraer el nombre del modulo, el sufijo mas largo primero (.cpython-*.so antes que .so)
+_SUFFIXES = sorted(set(_ORDER), key=len, reverse=True)
+
+
+def _scan(path):
+    """{{name: (location, kind)}} of one directory, resolved as FileFinder does:
+    a package beats a module file, which beats a namespace portion."""
+    found, rank = {{}}, {{}}
+
+    def offer(name, value, priority):
+        if priority < rank.get(name, len(_ORDER) + 2):
+            found[name], rank[name] = value, priority
+
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return found
+    for entry in entries:
+        name = entry.name
+        if entry.is_dir():
+            if not name.isidentifier():
+                continue
+            init = [os.path.join(entry.path, "__init__" + s) for s in _ORDER
+                    if os.path.exists(os.path.join(entry.path, "__init__" + s))]
+            if init:
+                offer(name, (init[0], "package"), 0)
+            else:
+                offer(name, (entry.path, "namespace"), len(_ORDER) + 1)
+        else:
+            for suffix in _SUFFIXES:
+                if name.endswith(suffix):
+                    offer(name[:-len(suffix)], (entry.path, "module"), 1 + _ORDER.index(suffix))
+                    break
+    return found
+
+
+def build(dirs):
+    """Index over dirs following PathFinder: the first regular module or package in
+    any dir wins; otherwise the name is a namespace package spanning every dir
+    that has a portion of it."""
+    index, mtimes = {{}}, []
+    for path in dirs:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        mtimes.append((path, mtime))
+        for name, (location, kind) in _scan(path).items():
+            known = index.get(name)
+            if kind == "namespace":
+                if known is None:
+                    index[name] = ([location], "namespace")
+                elif known[1] == "namespace":
+                    known[0].append(location)
+            elif known is None or known[1] == "namespace":
+                index[name] = (location, kind)
+    return index, mtimes
+
+
+class IndexFinder:
+    def __init__(self, index, dirs):
+        self.index = dict(index)
+        self.dirs = list(dirs)
+
+    def invalidate_caches(self):
+        stale = False
+        for path, mtime in self.dirs:
+            try:
+                stale = stale or os.stat(path).st_mtime_ns != mtime
+            except OSError:
+                stale = stale or mtime is not None
+        if stale:
+            self.index, self.dirs = build([path for path, _ in self.dirs])
+
+    def find_spec(self, name, path=None, target=None):
+        if path is not None:
+            return None
+        hit = self.index.get(name)
+        if hit is None:
+            return None
+        location, kind = hit
+        if kind == "module":
+            return spec_from_file_location(name, location)
+        if kind == "package":
+            return spec_from_file_location(name, location,
+                                           submodule_search_locations=[os.path.dirname(location)])
+        spec = ModuleSpec(name, None, is_package=True)
+        spec.submodule_search_locations = list(location)
+        return spec
+
+
+def install():
+    managed = {{os.path.normcase(os.path.abspath(p)) for p, _ in DIRS}}
+    sys.path[:] = [p for p in sys.path
+                   if not isinstance(p, str) or os.path.normcase(os.path.abspath(p)) not in managed]
+    finder = IndexFinder(INDEX, DIRS)
+    finder.invalidate_caches()
+    sys.meta_path.append(finder)
+    return finder
+'''
+
+
+def _runtime():
+    namespace = {}
+    exec(compile(RUNTIME.format(index={}, dirs=[]), MODULE_NAME, "exec"), namespace)
+    return namespace
+
+
+def managed_dirs(site_dir, pth_name=PTH_NAME):
+    lines = read_pth(os.path.join(site_dir, pth_name))
+    return [line for line in lines if not line.startswith(("#", "import "))]
+
+
+def is_enabled(site_dir):
+    return os.path.exists(os.path.join(site_dir, PTH_FILE))
+
+
+def write_index(site_dir, pth_name=PTH_NAME):
+    """(Re)generate <code>_djgit_pathindex.py</code> for the entries of <code>pth_name</code>."""
+    index, dirs = _runtime()["build"](managed_dirs(site_dir, pth_name))
+    _write_atomic(os.path.join(site_dir, MODULE_NAME + ".py"),
+                  RUNTIME.format(index=index, dirs=dirs))
+    return index
+
+
+def enable(site_dir=None):
+    site_dir = site_dir or find_site_packages()
+    index = write_index(site_dir)
+    _write_atomic(os.path.join(site_dir, PTH_FILE),
+                  f"import {MODULE_NAME}; {MODULE_NAME}.install()\n")
+    print(f"[OK] Path index enabled in {site_dir} ({len(index)} modules)")
+
+
+def disable(site_dir=None):
+    site_dir = site_dir or find_site_packages()
+    for file in (PTH_FILE, MODULE_NAME + ".py"):
+        path = os.path.join(site_dir, file)
+        if os.path.exists(path):
+            os.remove(path)
+    print(f"[OK] Path index disabled in {site_dir}")
+
+
+def refresh(site_dir):
+    """Rebuild the index if it is enabled in <code>site_dir</code>."""
+    if is_enabled(site_dir):
+        write_index(site_dir)
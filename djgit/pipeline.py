@@ -0,0 +1,113 @@
+import asyncio
+import functools
+import os
+import shutil
+import time
+
+from .tools import RemoteInfo, create_deploy_branch, clonar_deploy_branch
+from . import tracing
+
+STAGE_DIR = ".repo_deploy.stage"
+
+
+class StageTimer:
+    """Collects start/end times of pipeline stages and prints a timing report."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.stages = []
+
+    async def run(self, name, func, *args, **kwargs):
+        """Run the blocking <code>func</code> in a worker thread and record its timing."""
+        start = time.perf_counter()
+        try:
+            # run_in_executor en vez de asyncio.to_thread (3.9+): vale desde 3.7
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+        finally:
+            self.stages.append((name, start - self.t0, time.perf_counter() - start))
+
+    def report(self):
+        wall = time.perf_counter() - self.t0
+        busy = sum(duration for _, _, duration in self.stages)
+        print(50 * "-")
+        print(f"{'stage':<22}{'start (s)':>12}{'time (s)':>12}")
+        for name, start, duration in sorted(self.stages, key=lambda s: s[1]):
+            print(f"{name:<22}{start:>12.2f}{duration:>12.2f}")
+        print(f"{'wall':<22}{'':>12}{wall:>12.2f}")
+        print(f"{'overlap saved':<22}{'':>12}{max(busy - wall, 0):>12.2f}")
+        print(50 * "-")
+
+
+def sync_remote(remote):
+    """Create the remote 'deploy' branch if needed and clone it into <code>.repo_deploy</code>."""
+    if not remote.has_branch("deploy"):
+        print("La rama 'deploy' no existe en el repositorio remoto")
+        create_deploy_branch(remote.url)
+    else:
+        print("La rama 'deploy' existe en el repositorio remoto")
+
+    if ".git" in os.listdir(".repo_deploy"):
+        print("La rama 'deploy' ya ha sido clonada")
+        return False
+
+    print("Clonando la rama 'deploy' del repositorio remoto")
+    with tracing.stage("clone"):
+        clonar_deploy_branch(remote.url)
+    shutil.rmtree('.repo_deploy/scripts', ignore_errors=True)
+    shutil.rmtree('.repo_deploy/src', ignore_errors=True)
+    return True
+
+
+def _remote_query(url):
+    with tracing.stage("remote query"):
+        return RemoteInfo.fetch(url)
+
+
+def new_stage_dir():
+    """Empty staging folder next to <code>.repo_deploy</code>; git refuses to clone into a non-empty folder."""
+    shutil.rmtree(STAGE_DIR, ignore_errors=True)
+    os.makedirs(STAGE_DIR)
+    return STAGE_DIR
+
+
+def merge_staged(stage_dir=STAGE_DIR, target_dir=".repo_deploy"):
+    """Move every entry of <code>stage_dir</code> into <code>target_dir</code>, replacing existing ones."""
+    for entry in os.listdir(stage_dir):
+        src = os.path.join(stage_dir, entry)
+        dst = os.path.join(target_dir, entry)
+        if os.path.isdir(dst) and not os.path.islink(dst):
+            shutil.rmtree(dst)
+        elif os.path.lexists(dst):
+            os.remove(dst)
+        os.replace(src, dst)
+    os.rmdir(stage_dir)
+
+
+async def run_pipeline(stage_local, build, timer=None):
+    """
+    Run the remote stages (ref listing, branch creation, clone) concurrently with
+    <code>stage_local(stage_dir, name)</code>, which fills a staging folder with the
+    local files. Once both finish the staged files are merged into
+    <code>.repo_deploy</code> and <code>build(name, timer)</code> is awaited from
+    inside it. Returns the <code>StageTimer</code>.
+    """
+    timer = timer or StageTimer()
+    os.makedirs('.repo_deploy', exist_ok=True)
+
+    # la url es local (git remote -v); el nombre del paquete depende de ella
+    url = await timer.run("remote url", RemoteInfo.origin_url)
+    name = RemoteInfo(url, {}).name
+    stage_dir = new_stage_dir()
+
+    async def remote_stages():
+        remote = await timer.run("remote query", _remote_query, url)
+        print("Ramas remotas:", remote.branches)
+        await timer.run("clone", sync_remote, remote)
+
+    await asyncio.gather(remote_stages(), timer.run("stage local", stage_local, stage_dir, name))
+    await timer.run("merge", merge_staged, stage_dir)
+
+    os.chdir('.repo_deploy')
+    await build(name, timer)
+    return timer
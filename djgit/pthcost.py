@@ -0,0 +1,230 @@
+"""
+Import-time cost analysis of the entries that <code>addpath</code> manages in <code>conda.pth</code>.
+
+Every directory listed in the <code>.pth</code> file ends up on <code>sys.path</code>, so every
+import that is not resolved earlier walks through it. For each entry this module measures
+the directory size, the <code>stat</code> calls and the time the <code>importlib</code> path
+finder spends on it for a set of probe imports, flags duplicate entries and modules
+shadowed by earlier entries (or by the standard library), and suggests a cheaper order
+that keeps every shadowing relation intact.
+
+Example usage:
+```bash
+djgit_addpath --analyze
+djgit_addpath --analyze --apply-order
+djgit_addpath --analyze --apply-order --prune-missing
+```
+"""
+import importlib._bootstrap_external as _bootstrap_external
+import importlib.machinery
+import os
+import sys
+import time
+
+from .addpath import PTH_NAME, _normalize, _write_atomic, find_site_packages, read_pth
+from .pathindex import refresh
+
+_LOADERS = [
+    (importlib.machinery.ExtensionFileLoader, importlib.machinery.EXTENSION_SUFFIXES),
+    (importlib.machinery.SourceFileLoader, importlib.machinery.SOURCE_SUFFIXES),
+    (importlib.machinery.SourcelessFileLoader, importlib.machinery.BYTECODE_SUFFIXES),
+]
+_MODULE_SUFFIXES = tuple(importlib.machinery.all_suffixes())
+
+
+def _default_probes():
+    # nombres que casi nunca estan en estos directorios: miden el coste de un "fallo"
+    names = getattr(sys, "stdlib_module_names", None) or sys.builtin_module_names
+    return sorted(n for n in names if not n.startswith("_"))[:200]
+
+
+def top_level_modules(path):
+    """Names importable at top level from directory <code>path</code>."""
+    names = set()
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return names
+    for entry in entries:
+        if entry.is_dir():
+            if entry.name.isidentifier():
+                names.add(entry.name)
+        elif entry.name.endswith(_MODULE_SUFFIXES):
+            names.add(entry.name.split(".", 1)[0])
+    return names
+
+
+def measure_entry(path, probes, repeat=3):
+    """
+    Time and count <code>stat</code> calls of a fresh <code>FileFinder</code> for
+    <code>path</code> looking up every name in <code>probes</code> (best of <code>repeat</code>).
+    """
+    calls = [0]
+    real_stat = _bootstrap_external._path_stat
+
+    def counting_stat(p):
+        calls[0] += 1
+        return real_stat(p)
+
+    best = None
+    _bootstrap_external._path_stat = counting_stat
+    try:
+        for _ in range(repeat):
+            calls[0] = 0
+            t0 = time.perf_counter()
+            finder = importlib.machinery.FileFinder(path, *_LOADERS)
+            for name in probes:
+                finder.find_spec(name)
+            elapsed = time.perf_counter() - t0
+            if best is None or elapsed < best[0]:
+                best = (elapsed, calls[0])
+    finally:
+        _bootstrap_external._path_stat = real_stat
+    return best
+
+
+def suggest_order(entries, cost, shadows):
+    """
+    Cheapest-first order of <code>entries</code> that keeps every pair in
+    <code>shadows</code> (<code>(earlier, later)</code>) in its original relative order.
+    """
+    must_follow = {e: set() for e in entries}
+    for earlier, later in shadows:
+        must_follow[later].add(earlier)
+
+    placed, order = set(), []
+    remaining = list(entries)
+    while remaining:
+        ready = [e for e in remaining if must_follow[e] <= placed]
+        nxt = min(ready, key=lambda e: (cost[e], remaining.index(e)))
+        order.append(nxt)
+        placed.add(nxt)
+        remaining.remove(nxt)
+    return order
+
+
+def analyze(site_dir=None, pth_name=PTH_NAME, probes=None, repeat=3):
+    """
+    Analyse the managed <code>.pth</code> file. Returns a dict with the per-entry
+    measurements (<code>entries</code>), <code>duplicates</code>, <code>shadowed</code>
+    modules, <code>missing</code> entries, the <code>current</code> and <code>suggested</code>
+    orders (<code>groups</code>: the suggested order of each run of path lines between
+    comment/<code>import</code> lines) and the <code>pth_file</code> path.
+    """
+    site_dir = site_dir or find_site_packages()
+    if not site_dir:
+        raise RuntimeError("No 'site-packages' / 'dist-packages' directory found for this interpreter.")
+    pth_file = os.path.join(site_dir, pth_name)
+    probes = probes or _default_probes()
+
+    raw = read_pth(pth_file)
+    lines = [line for line in raw if not line.startswith(("#", "import "))]
+
+    # grupos de rutas entre lineas que no son rutas: las "import" ven sys.path tal
+    # como esta en su posicion, asi que solo se reordena dentro de cada grupo
+    seen, unique, duplicates, groups = {}, [], [], [[]]
+    for line in raw:
+        if line.startswith(("#", "import ")):
+            groups.append([])
+            continue
+        norm = _normalize(line)
+        if norm in seen:
+            duplicates.append(line)
+        else:
+            seen[norm] = line
+            unique.append(line)
+            groups[-1].append(line)
+
+    stdlib = set(getattr(sys, "stdlib_module_names", ())) | set(sys.builtin_module_names)
+    provider = {}
+    shadowed = []
+    shadows = set()
+    results = []
+    for line in unique:
+        exists = os.path.isdir(line)
+        modules = top_level_modules(line) if exists else set()
+        seconds, stats = measure_entry(line, probes, repeat) if exists else (0.0, 0)
+        for mod in sorted(modules):
+            if mod in stdlib:
+                shadowed.append({"module": mod, "entry": line, "by": "stdlib"})
+            elif mod in provider:
+                shadowed.append({"module": mod, "entry": line, "by": provider[mod]})
+                shadows.add((provider[mod], line))
+            else:
+                provider[mod] = line
+        try:
+            size = len(os.listdir(line)) if exists else 0
+        except OSError:
+            size = 0
+        results.append({
+            "path": line,
+            "exists": exists,
+            "dir_entries": size,
+            "modules": len(modules),
+            "stat_calls": stats,
+            "seconds": seconds,
+            "us_per_import": seconds / len(probes) * 1e6,
+        })
+
+    cost = {r["path"]: r["seconds"] for r in results}
+    # las entradas inexistentes se conservan; solo apply_order(prune_missing=True) las quita
+    groups = [suggest_order(group, cost, {(a, b) for a, b in shadows if a in group and b in group})
+              for group in groups]
+    suggested = [p for group in groups for p in group]
+    return {
+        "pth_file": pth_file,
+        "entries": results,
+        "duplicates": duplicates,
+        "shadowed": shadowed,
+        "missing": [r["path"] for r in results if not r["exists"]],
+        "current": lines,
+        "suggested": suggested,
+        "groups": groups,
+        "probes": len(probes),
+    }
+
+
+def print_report(report):
+    print(f"Analysing {report['pth_file']} ({report['probes']} probe imports per entry)")
+    print(f"{'us/import':>10}{'stats':>8}{'entries':>9}{'mods':>6}  path")
+    for r in report["entries"]:
+        flag = "" if r["exists"] else "  [missing]"
+        print(f"{r['us_per_import']:>10.1f}{r['stat_calls']:>8}{r['dir_entries']:>9}{r['modules']:>6}  {r['path']}{flag}")
+    for d in report["duplicates"]:
+        print(f"[WARN] Duplicate entry: {d}")
+    for m in report["missing"]:
+        print(f"[WARN] Missing entry (kept unless --prune-missing): {m}")
+    for s in report["shadowed"]:
+        print(f"[WARN] Module '{s['module']}' in {s['entry']} is shadowed by {s['by']}")
+    if report["suggested"] != report["current"]:
+        print("Suggested order:")
+        for p in report["suggested"]:
+            print(f"  {p}")
+    else:
+        print("[OK] Current order is already the suggested one")
+
+
+def apply_order(report, prune_missing=False):
+    """
+    Rewrite the <code>.pth</code> file atomically with the suggested order. Path lines
+    only move within the run of paths they belong to: comments and <code>import</code>
+    lines keep their position, and every <code>import</code> line still sees the same
+    entries before it, since they run in file order. Repeated paths (which <code>site</code> skips anyway) are
+    dropped; entries that do not exist are kept unless <code>prune_missing</code>.
+    """
+    pth_file = report["pth_file"]
+    missing = set(report["missing"]) if prune_missing else set()
+    lines, group = [], 0
+    emitted = set()
+    for line in read_pth(pth_file):
+        if line.startswith(("#", "import ")):
+            lines.append(line)
+            group += 1
+        elif group not in emitted:
+            # la primera ruta del grupo recibe el grupo entero ya ordenado
+            emitted.add(group)
+            lines += [p for p in report["groups"][group] if p not in missing]
+    _write_atomic(pth_file, "".join(line + "\n" for line in lines))
+    refresh(os.path.dirname(pth_file))
+    pruned = f", {len(missing)} missing entries removed" if missing else ""
+    print(f"[OK] {pth_file} reordered{pruned}")
@@ -0,0 +1,738 @@
+"""
+py2md_core.py
+
+Modelos, parser y generador de Markdown usados por `py2md_docs`.
+Separado del CLI para que `djgit_docs --help` no importe ast/dataclasses/typing.
+"""
+
+from __future__ import annotations
+import ast, bisect, contextlib, gzip, hashlib, io, json, os, re, textwrap, time, tokenize, unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Dict
+
+# ---------- MODELOS ----------
+
+@dataclass
+class FunctionDoc:
+    name: str
+    qualname: str
+    signature: str
+    doc: str | None
+    lineno: int
+
+@dataclass
+class ClassDoc:
+    name: str
+    qualname: str
+    doc: str | None
+    lineno: int
+    methods: List[FunctionDoc] = field(default_factory=list)
+
+@dataclass
+class ModuleDoc:
+    path: Path
+    module_name: str
+    package_path: str
+    doc: str | None
+    classes: List[ClassDoc] = field(default_factory=list)
+    functions: List[FunctionDoc] = field(default_factory=list)
+    comments: List[Tuple[int, str]] = field(default_factory=list)
+
+# ---------- HELPERS ----------
+
+def _expr_to_str(expr: ast.AST) -> str:
+    try:
+        return ast.unparse(expr)  # Python 3.9+
+    except Exception:
+        if isinstance(expr, ast.Constant):
+            return repr(expr.value)
+        if isinstance(expr, ast.Name):
+            return expr.id
+        return "..."
+
+def _arg_to_str(arg: ast.arg, default: Optional[ast.AST]=None) -> str:
+    s = arg.arg
+    if default is not None:
+        s += "=" + _expr_to_str(default)
+    return s
+
+def _format_signature(node: ast.FunctionDef | ast.AsyncFunctionDef) -> str:
+    args = node.args
+    parts: List[str] = []
+    # posicionales
+    pos_defaults = [None] * (len(args.args) - len(args.defaults)) + list(args.defaults)
+    for a, d in zip(args.args, pos_defaults):
+        parts.append(_arg_to_str(a, d))
+    # *args
+    if args.vararg:
+        parts.append("*" + args.vararg.arg)
+    # kw-only
+    if args.kwonlyargs and not args.vararg and not args.kwarg:
+        parts.append("*")
+    for a, d in zip(args.kwonlyargs, args.kw_defaults):
+        parts.append(_arg_to_str(a, d))
+    # **kwargs
+    if args.kwarg:
+        parts.append("**" + args.kwarg.arg)
+    ann = f" -> {_expr_to_str(node.returns)}" if node.returns else ""
+    return f"({', '.join(parts)}){ann}"
+
+def _gather_comments(code: str) -> List[Tuple[int, str]]:
+    out: List[Tuple[int, str]] = []
+    buff = io.StringIO(code)
+    for tok in tokenize.generate_tokens(buff.readline):
+        if tok.type == tokenize.COMMENT:
+            text = tok.string.lstrip("#").strip()
+            if text:
+                out.append((tok.start[0], text))
+    return out
+
+def _public(name: str) -> bool:
+    return not name.startswith("_")
+
+# ---------- PERFILADO ----------
+
+PROFILE_PHASES = ("read", "parse", "comments", "render", "write")
+
+class DocsProfile:
+    """
+    Per-file phase timings of a docs build (<code>read</code>, <code>ast.parse</code>,
+    comment gathering, render, write) plus source and output sizes. With
+    <code>cprofile=True</code> each phase is also sampled by its own
+    <code>cProfile.Profile</code>, so hot functions can be told apart per phase.
+    """
+
+    def __init__(self, cprofile: bool = False):
+        self.files: Dict[str, Dict[str, float]] = {}
+        self.current: Optional[Dict[str, float]] = None
+        self.profilers = {}
+        if cprofile:
+            import cProfile
+            self.profilers = {phase: cProfile.Profile() for phase in PROFILE_PHASES}
+
+    def begin(self, py_path: Path) -> None:
+        """Start the record of <code>py_path</code>; later phases are added to it."""
+        self.current = {"module": "", **{phase: 0.0 for phase in PROFILE_PHASES},
+                        "bytes_in": py_path.stat().st_size, "bytes_out": 0}
+        self.files[str(py_path)] = self.current
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        prof = self.profilers.get(name)
+        t0 = time.perf_counter()
+        if prof:
+            prof.enable()
+        try:
+            yield
+        finally:
+            if prof:
+                prof.disable()
+            if self.current is not None:
+                self.current[name] += time.perf_counter() - t0
+
+    def rows(self) -> List[Dict[str, float]]:
+        """One dict per file, slowest first."""
+        rows = [{"path": path, **rec, "total": sum(rec[p] for p in PROFILE_PHASES)}
+                for path, rec in self.files.items()]
+        return sorted(rows, key=lambda r: r["total"], reverse=True)
+
+    def report(self) -> Dict:
+        rows = self.rows()
+        totals = {phase: sum(r[phase] for r in rows) for phase in PROFILE_PHASES}
+        totals.update(files=len(rows), total=sum(totals.values()),
+                      bytes_in=sum(r["bytes_in"] for r in rows), bytes_out=sum(r["bytes_out"] for r in rows))
+        return {"phases": list(PROFILE_PHASES), "totals": totals, "files": rows}
+
+    def write(self, path: Path) -> List[Path]:
+        """Write the JSON report to <code>path</code> and, with cProfile, <code>&lt;stem&gt;.&lt;phase&gt;.prof</code> next to it."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
+        written = [path]
+        for phase, prof in self.profilers.items():
+            stats_path = path.with_name(f"{path.stem}.{phase}.prof")
+            prof.dump_stats(str(stats_path))
+            written.append(stats_path)
+        return written
+
+    def summary(self, top: int = 20) -> str:
+        rows = self.rows()
+        lines = [f"{'module':<48}{'total':>9}" + "".join(f"{p:>10}" for p in PROFILE_PHASES) + f"{'out KB':>9}"]
+        for r in rows[:top]:
+            name = r["module"] or r["path"]
+            name = name if len(name) <= 47 else "…" + name[-46:]
+            lines.append(f"{name:<48}{r['total'] * 1e3:>7.1f}ms"
+                         + "".join(f"{r[p] * 1e3:>8.1f}ms" for p in PROFILE_PHASES)
+                         + f"{r['bytes_out'] / 1024:>9.1f}")
+        totals = self.report()["totals"]
+        lines.append(f"{'TOTAL (' + str(totals['files']) + ' files)':<48}{totals['total'] * 1e3:>7.1f}ms"
+                     + "".join(f"{totals[p] * 1e3:>8.1f}ms" for p in PROFILE_PHASES)
+                     + f"{totals['bytes_out'] / 1024:>9.1f}")
+        return "\n".join(lines)
+
+def _phase(profile: Optional[DocsProfile], name: str):
+    return profile.phase(name) if profile is not None else contextlib.nullcontext()
+
+# ---------- PARSE ----------
+
+def parse_module(py_path: Path, src_root: Path, profile: Optional[DocsProfile] = None) -> ModuleDoc:
+    with _phase(profile, "read"):
+        code = py_path.read_text(encoding="utf-8")
+    with _phase(profile, "parse"):
+        mod = ast.parse(code)
+    module_doc = ast.get_docstring(mod)
+    rel = py_path.relative_to(src_root)
+    module_name = ".".join(rel.with_suffix("").parts)
+    package_path = str(rel.as_posix())
+
+    classes: List[ClassDoc] = []
+    functions: List[FunctionDoc] = []
+
+    for node in mod.body:
+        if isinstance(node, ast.ClassDef) and _public(node.name):
+            cdoc = ClassDoc(
+                name=node.name,
+                qualname=f"{module_name}.{node.name}",
+                doc=ast.get_docstring(node),
+                lineno=node.lineno,
+                methods=[]
+            )
+            for sub in node.body:
+                if isinstance(sub, (ast.FunctionDef, ast.AsyncFunctionDef)) and _public(sub.name):
+                    cdoc.methods.append(FunctionDoc(
+                        name=sub.name,
+                        qualname=f"{module_name}.{node.name}.{sub.name}",
+                        signature=_format_signature(sub),
+                        doc=ast.get_docstring(sub),
+                        lineno=sub.lineno
+                    ))
+            classes.append(cdoc)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and _public(node.name):
+            functions.append(FunctionDoc(
+                name=node.name,
+                qualname=f"{module_name}.{node.name}",
+                signature=_format_signature(node),
+                doc=ast.get_docstring(node),
+                lineno=node.lineno
+            ))
+
+    with _phase(profile, "comments"):
+        comments = _gather_comments(code)
+    return ModuleDoc(
+        path=py_path,
+        module_name=module_name,
+        package_path=package_path,
+        doc=module_doc,
+        classes=sorted(classes, key=lambda c: c.name.lower()),
+        functions=sorted(functions, key=lambda f: f.name.lower()),
+        comments=comments
+    )
+
+# ---------- RENDER DE DOCSTRINGS ----------
+
+# versión de la salida de render_docstring para DocRenderCache: súbela al cambiar el render
+RENDER_VERSION = "1"
+RENDER_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "djgit", "py2md_render.json")
+
+_HTML_BLOCK = re.compile(r"</?(table|thead|tbody|tfoot|tr|th|td|ul|ol|li|p|div|pre|details|summary"
+                         r"|blockquote|h[1-6]|hr|br)\b", re.IGNORECASE)
+
+def render_docstring(doc: str) -> str:
+    """
+    Markdown-ready docstring: prose runs are dedented (in the HTML-table docstrings the
+    first paragraph keeps its indentation and would render as a code block) and a blank
+    line is put before HTML blocks and code fences. Fenced code is left untouched.
+    """
+    lines = doc.strip().splitlines()
+    out: List[str] = []
+    prose: List[str] = []
+    in_fence = False
+    in_html = False
+
+    def flush():
+        if prose:
+            # como inspect.cleandoc: la primera línea no cuenta para la sangría común
+            first = [prose.pop(0).lstrip()] if not out else []
+            out.extend(first + textwrap.dedent("\n".join(prose)).splitlines())
+            prose.clear()
+
+    for line in lines:
+        stripped = line.strip()
+        if in_fence:
+            out.append(line)
+            in_fence = not stripped.startswith("```")
+            continue
+        fence = stripped.startswith("```")
+        if fence or _HTML_BLOCK.match(stripped):
+            flush()
+            if (fence or not in_html) and out and out[-1].strip():
+                out.append("")
+            in_fence, in_html = fence, not fence
+            out.append(line.lstrip())
+            continue
+        in_html = in_html and bool(stripped)
+        if in_html:
+            out.append(stripped)
+        else:
+            prose.append(line)
+    flush()
+    return "\n".join(out).strip()
+
+render_docstring.version = RENDER_VERSION
+
+
+class DocRenderCache:
+    """
+    Memoizes a docstring renderer by content hash, so identical or unchanged docstrings
+    are rendered once. Memory is bounded by an LRU of <code>maxsize</code> entries; the
+    entries are persisted to <code>path</code> between runs. Keys include the renderer's
+    module, qualified name and <code>version</code> (default: its <code>version</code>
+    attribute), which must be bumped whenever the renderer's output changes.
+    """
+
+    def __init__(self, render=render_docstring, maxsize: int = 4096, path: Optional[str] = RENDER_CACHE,
+                 version: Optional[str] = None):
+        self.render_fn = render
+        self.version = version if version is not None else str(getattr(render, "version", ""))
+        self.maxsize = maxsize
+        self.path = path
+        self.entries: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.loaded = False
+
+    def _key(self, doc: str) -> str:
+        fn = self.render_fn
+        tag = f"{getattr(fn, '__module__', '')}.{getattr(fn, '__qualname__', '')}:{self.version}:"
+        return hashlib.sha1((tag + doc).encode("utf-8")).hexdigest()
+
+    def render(self, doc: str) -> str:
+        key = self._key(doc)
+        hit = self.entries.get(key)
+        if hit is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return hit
+        self.misses += 1
+        rendered = self.render_fn(doc)
+        self.entries[key] = rendered
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return rendered
+
+    def load(self) -> None:
+        self.loaded = True
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        # orden LRU: las guardadas (de la más antigua a la más reciente) y después las que
+        # ya están en memoria, que son más recientes y tienen prioridad
+        merged: "OrderedDict[str, str]" = OrderedDict(
+            (key, rendered) for key, rendered in stored.items() if key not in self.entries)
+        merged.update(self.entries)
+        self.entries = merged
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"  # varios shards pueden guardar a la vez
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # la caché es solo una optimización
+
+    def reset_stats(self) -> None:
+        self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+# caché compartida del proceso; un proceso de larga vida (djgit.daemon) la mantiene caliente
+_RENDER_CACHE = DocRenderCache()
+
+# ---------- GENERACIÓN MD ----------
+
+def md_for_module(m: ModuleDoc, include_comments: bool = False,
+                  render_cache: Optional[DocRenderCache] = None) -> str:
+    render = (render_cache or _RENDER_CACHE).render
+    title = m.module_name or m.path.stem
+    out: List[str] = []
+    out.append(f"# `{title}`\n")
+    out.append(f"*Source:* `{m.package_path}`\n")
+
+    if m.doc:
+        out.append("\n# Overview\n")
+        out.append(render(m.doc) + "\n")
+
+    if m.classes:
+        out.append("\n# Classes\n")
+        for c in m.classes:
+            out.append(f"###`{c.name}`\n")
+            if c.doc:
+                out.append(render(c.doc) + "\n")
+            if c.methods:
+                out.append("\n#### Methods\n")
+                for f in c.methods:
+                    out.append(f"- **`{f.name}{f.signature}`**  \n")
+                    if f.doc:
+                        out.append(f"  {render(f.doc)}\n")
+
+    if m.functions:
+        out.append("\n# Functions")
+        for f in m.functions:
+            # add the way to import 
+            out.append(f"## `{f.name}{f.signature}`\n")
+
+            out.append(f"```python\nfrom {f.qualname} import {f.name}\n```\n")
+
+            if f.doc:
+                out.append(f"{render(f.doc)}\n")
+
+    if include_comments and m.comments:
+        out.append("\n## Comment index\n")
+        for ln, txt in m.comments:
+            out.append(f"- L{ln}: {txt}")
+
+    out.append("\n---\n")
+    out.append(f"*Auto-generated by `py2md_docs.py`.*\n")
+    return "\n".join(out)
+
+# ---------- ÍNDICE DE SÍMBOLOS ----------
+
+SYMBOL_INDEX = "symbols.json"
+_HEADING = re.compile(r"^(#{1,6})\s*(.+?)\s*#*\s*$")
+
+def _slugify(text: str) -> str:
+    # igual que markdown.extensions.toc.slugify (anclas por defecto de mkdocs)
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(r"[^\w\s-]", "", text).strip().lower()
+    return re.sub(r"[-\s]+", "-", text)
+
+def _heading_text(raw: str) -> str:
+    # texto visible del titulo: fuera de `code` se quitan etiquetas y **; dentro se
+    # conserva literal (las firmas con **kwargs deben seguir coincidiendo)
+    parts = raw.split("`")
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"<[^>]+>", "", parts[i]).replace("**", "")
+    return "".join(parts)
+
+def heading_anchors(md: str) -> Dict[str, str]:
+    """
+    `{heading text: anchor}` of a generated page, with the ids the mkdocs `toc`
+    extension gives them (repeated headings get `_1`, `_2`, ...). Headings inside code
+    fences are skipped; for repeated texts the first anchor is kept.
+    """
+    anchors: Dict[str, str] = {}
+    used = set()
+    in_fence = False
+    for line in md.splitlines():
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+            continue
+        match = None if in_fence else _HEADING.match(line)
+        if not match:
+            continue
+        text = _heading_text(match.group(2))
+        base = anchor = _slugify(text)
+        n = 0
+        while anchor in used:
+            n += 1
+            anchor = f"{base}_{n}"
+        used.add(anchor)
+        anchors.setdefault(text, anchor)
+    return anchors
+
+def _summary(doc: str | None, width: int = 120) -> str:
+    for line in (doc or "").splitlines():
+        line = re.sub(r"<[^>]+>", "", line).strip()
+        if line:
+            return line if len(line) <= width else line[:width - 1] + "…"
+    return ""
+
+def module_symbols(m: ModuleDoc, md: str, page: str) -> List[list]:
+    """
+    Index entries <code>[qualname, kind, signature, summary, page, anchor]</code> of a module
+    rendered as <code>md</code> into <code>page</code> (path relative to the docs root).
+    Methods have no heading of their own and point at their class.
+    """
+    anchors = heading_anchors(md)
+    title = m.module_name or m.path.stem
+    entries = [[title, "module", "", _summary(m.doc), page, anchors.get(title, "")]]
+    for c in m.classes:
+        anchor = anchors.get(c.name, "")
+        entries.append([c.qualname, "class", "", _summary(c.doc), page, anchor])
+        for f in c.methods:
+            entries.append([f.qualname, "method", f.signature, _summary(f.doc), page, anchor])
+    for f in m.functions:
+        entries.append([f.qualname, "function", f.signature, _summary(f.doc), page,
+                        anchors.get(f"{f.name}{f.signature}", "")])
+    return entries
+
+def write_symbol_index(path: Path, symbols: List[list], compress: bool = False) -> Path:
+    """
+    Write the compact symbol index. Symbols are sorted by lowercase qualified name
+    (prefix lookup by bisection), pages are stored once and referenced by position, and
+    <code>names</code> is a second sorted list <code>[short name, symbol]</code> for
+    lookups by unqualified name. With <code>compress</code>, <code>.gz</code> is appended.
+    """
+    symbols = sorted(symbols, key=lambda s: (s[0].lower(), s[0]))
+    pages = sorted({s[4] for s in symbols})
+    page_no = {p: i for i, p in enumerate(pages)}
+    rows = [[q, kind, sig, summary, page_no[page], anchor] for q, kind, sig, summary, page, anchor in symbols]
+    names = sorted([q.rsplit(".", 1)[-1].lower(), i] for i, (q, *_rest) in enumerate(rows))
+    data = json.dumps({"version": 1, "fields": ["qualname", "kind", "signature", "summary", "page", "anchor"],
+                       "pages": pages, "symbols": rows, "names": names},
+                      ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if compress:
+        path = path.with_name(path.name + ".gz")
+        data = gzip.compress(data, mtime=0)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return path
+
+class SymbolIndex:
+    """Prefix lookup over a file written by <code>write_symbol_index</code> (plain or gzip)."""
+
+    def __init__(self, path: Path):
+        raw = Path(path).read_bytes()
+        data = json.loads(gzip.decompress(raw) if raw[:2] == b"\x1f\x8b" else raw)
+        self.pages: List[str] = data["pages"]
+        self.symbols: List[list] = data["symbols"]
+        self.names: List[list] = data["names"]
+        self._keys = [s[0].lower() for s in self.symbols]
+        self._name_keys = [n[0] for n in self.names]
+
+    def _entry(self, i: int) -> Dict[str, str]:
+        qualname, kind, signature, summary, page, anchor = self.symbols[i]
+        url = self.pages[page] + (f"#{anchor}" if anchor else "")
+        return {"qualname": qualname, "kind": kind, "signature": signature, "summary": summary, "url": url}
+
+    def lookup(self, prefix: str, limit: int = 20) -> List[Dict[str, str]]:
+        """Symbols whose qualified or short name starts with <code>prefix</code> (case-insensitive)."""
+        prefix = prefix.lower()
+        found: List[int] = []
+        for keys, pick in ((self._keys, lambda j: j), (self._name_keys, lambda j: self.names[j][1])):
+            j = bisect.bisect_left(keys, prefix)
+            while j < len(keys) and keys[j].startswith(prefix) and len(found) < limit:
+                if pick(j) not in found:
+                    found.append(pick(j))
+                j += 1
+        return [self._entry(i) for i in found]
+
+# ---------- SHARDS ----------
+
+SHARD_MANIFEST = ".py2md-shard-{index}-of-{count}.json"
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """`(index, count)` from `"I/N"` with `1 <= I <= N`."""
+    try:
+        index, count = (int(x) for x in text.split("/"))
+    except ValueError:
+        raise ValueError(f"invalid shard '{text}', expected I/N (e.g. 2/8)") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"invalid shard '{text}': I must be between 1 and N")
+    return index, count
+
+def shard_of(rel_path: str, count: int) -> int:
+    """1-based shard of a source file; stable across machines and runs (hash of its relative path)."""
+    h = hashlib.sha1(rel_path.encode("utf-8")).digest()
+    return int.from_bytes(h[:8], "big") % count + 1
+
+def write_manifest(out_dir: Path, md_files: List[Path], shard: Tuple[int, int],
+                   symbols: Optional[List[list]] = None) -> Path:
+    """Partial nav of one shard: its pages relative to <code>out_dir</code> and their symbol index entries."""
+    index, count = shard
+    out_dir = out_dir.resolve()
+    path = out_dir / SHARD_MANIFEST.format(index=index, count=count)
+    data = {"version": 1, "shard": [index, count],
+            "files": sorted(p.resolve().relative_to(out_dir).as_posix() for p in md_files),
+            "symbols": symbols or []}
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+def find_manifests(out_dir: Path) -> List[Path]:
+    return sorted(out_dir.glob(SHARD_MANIFEST.format(index="*", count="*")))
+
+def merge_manifests(manifests: List[Path], symbols: Optional[List[list]] = None) -> List[str]:
+    """
+    Sorted union of the pages listed by the shard manifests; their symbol index entries
+    are appended to <code>symbols</code> if given. Raises <code>ValueError</code> if they
+    come from runs with different shard counts, or if a shard is missing.
+    """
+    counts, seen, files = set(), set(), set()
+    for path in manifests:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        index, count = data["shard"]
+        counts.add(count)
+        seen.add(index)
+        files.update(data["files"])
+        if symbols is not None:
+            symbols.extend(data.get("symbols", []))
+    if not counts:
+        raise ValueError("no shard manifests found")
+    if len(counts) > 1:
+        raise ValueError(f"manifests from different shard counts {sorted(counts)}; remove the stale ones")
+    missing = sorted(set(range(1, counts.pop() + 1)) - seen)
+    if missing:
+        raise ValueError(f"missing shard manifests: {missing}")
+    return sorted(files)
+
+# ---------- MOTOR ----------
+
+# (ruta, raíz) -> (mtime_ns, tamaño, ModuleDoc); persiste mientras viva el proceso (djgit.daemon)
+_PARSE_CACHE: Dict[Tuple[str, str], Tuple[int, int, ModuleDoc]] = {}
+
+def parse_module_cached(py_path: Path, src_root: Path) -> ModuleDoc:
+    """`parse_module` reusing the previous result while the file's mtime and size are unchanged."""
+    st = py_path.stat()
+    key = (str(py_path), str(src_root))
+    hit = _PARSE_CACHE.get(key)
+    if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+    mdoc = parse_module(py_path, src_root)
+    _PARSE_CACHE[key] = (st.st_mtime_ns, st.st_size, mdoc)
+    return mdoc
+
+def iter_sources(src_dir: Path) -> List[Path]:
+    """Python files of <code>src_dir</code> that get a page, in a stable order."""
+    return sorted(py for py in src_dir.rglob("*.py")
+                  if not any(part in {"__pycache__", "venv", ".venv", "build", "dist", "site"} for part in py.parts))
+
+def generate_docs(src_dir: Path, out_dir: Path, include_comments: bool, mirror_tree: bool,
+                  render_cache: Optional[DocRenderCache] = None,
+                  profile: Optional[DocsProfile] = None,
+                  shard: Optional[Tuple[int, int]] = None,
+                  symbols: Optional[List[list]] = None) -> List[Path]:
+    """
+    Write one Markdown page per module of <code>src_dir</code> into <code>out_dir</code>.
+    With <code>profile</code>, every file is timed phase by phase (the parse cache is
+    bypassed so each file is really read and parsed). With <code>shard=(i, n)</code>
+    only the files for which <code>shard_of</code> is <code>i</code> are processed. The
+    symbol index entries of every page (see <code>module_symbols</code>) are appended to
+    <code>symbols</code> if given.
+    """
+    render_cache = render_cache or _RENDER_CACHE
+    if not render_cache.loaded:
+        render_cache.load()
+    src_dir = src_dir.resolve()
+    out_dir = out_dir.resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    md_paths: List[Path] = []
+
+    for py in iter_sources(src_dir):
+        if shard is not None and shard_of(py.relative_to(src_dir).as_posix(), shard[1]) != shard[0]:
+            continue
+        if profile is not None:
+            profile.begin(py)
+            mdoc = parse_module(py, src_dir, profile=profile)
+            profile.current["module"] = mdoc.module_name
+        else:
+            mdoc = parse_module_cached(py, src_dir)
+        if mirror_tree:
+            rel = py.relative_to(src_dir).with_suffix(".md")
+            dst = (out_dir / rel)
+        else:
+            name = ".".join(py.relative_to(src_dir).with_suffix("").parts) + ".md"
+            dst = out_dir / name
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        with _phase(profile, "render"):
+            md = md_for_module(mdoc, include_comments=include_comments, render_cache=render_cache)
+        with _phase(profile, "write"):
+            data = md.encode("utf-8")
+            dst.write_bytes(data)
+        if profile is not None:
+            profile.current["bytes_out"] = len(data)
+        if symbols is not None:
+            symbols.extend(module_symbols(mdoc, md, dst.relative_to(out_dir).as_posix()))
+        md_paths.append(dst)
+
+    render_cache.save()
+    return md_paths
+
+# ---------- MKDOCS.YML AUTO-UPDATE ----------
+
+def update_mkdocs_yaml(mkdocs_path: Path, docs_root: Path, md_files: List[Path],
+                       top_section: str = "Referencia", subgroup: str | None = "API") -> None:
+    from ruamel.yaml import YAML
+    yaml = YAML()
+    yaml.preserve_quotes = True
+    yaml.indent(mapping=2, sequence=4, offset=2)
+
+    data = {}
+    if mkdocs_path.exists():
+        with mkdocs_path.open("r", encoding="utf-8") as f:
+            data = yaml.load(f) or {}
+
+    # asegúrate de que hay una clave 'nav' lista
+    nav = data.get("nav")
+    if nav is None:
+        nav = []
+        data["nav"] = nav
+
+    # construimos lista de rutas relativas para mkdocs
+    rel_paths = [str(p.relative_to(docs_root).as_posix()) for p in md_files]
+    rel_paths.sort()
+
+    # construir estructura: {top_section: {subgroup: [ {Title: path}, ... ]}}
+    def title_from_path(p: str) -> str:
+        return Path(p).stem.replace("_", " ").title()
+
+    items = [{title_from_path(p): p} for p in rel_paths]
+
+    # buscar o crear sección principal
+    def find_section(nav_list, key):
+        for i, item in enumerate(nav_list):
+            if isinstance(item, dict) and key in item:
+                return i, item[key]
+        return None, None
+
+    idx, section_val = find_section(nav, top_section)
+    if idx is None:
+        # crear
+        if subgroup:
+            section_val = [{subgroup: items}]
+        else:
+            section_val = items
+        nav.append({top_section: section_val})
+    else:
+        # existe
+        if subgroup:
+            # buscar subgroup dentro
+            sub_idx, sub_val = find_section(section_val, subgroup) if isinstance(section_val, list) else (None, None)
+            if sub_idx is None:
+                # añadir subgroup nuevo
+                if isinstance(section_val, list):
+                    section_val.append({subgroup: items})
+                else:
+                    # caso raro, normaliza a lista
+                    data["nav"][idx] = {top_section: [{subgroup: items}]}
+            else:
+                # reemplazar por completo el grupo (idempotente)
+                section_val[sub_idx] = {subgroup: items}
+        else:
+            # reemplazar lista de items
+            if isinstance(section_val, list):
+                data["nav"][idx] = {top_section: items}
+            else:
+                data["nav"][idx] = {top_section: items}
+
+    # escribir de vuelta
+    with mkdocs_path.open("w", encoding="utf-8") as f:
+        yaml.dump(data, f)
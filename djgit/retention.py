@@ -0,0 +1,214 @@
+"""
+Retention policies and garbage collection for the <code>.copylibs/&lt;timestamp&gt;</code> snapshots.
+
+Snapshots can share storage: with <code>Store.link_copy</code> as copy function, every
+file of a snapshot is a hard link to a content-addressed object in
+<code>.copylibs/.store/&lt;sha256&gt;</code>, so unchanged files cost no extra space across
+snapshots. Store objects are made read-only, since a change would show in every
+snapshot linking them.
+
+<code>gc()</code> keeps the snapshots selected by the policies (last N, newest per day for
+the last D days, newest per ISO week for the last W weeks, then drops the oldest until
+the unique bytes fit in <code>max_bytes</code>; the newest snapshot is always kept).
+Deleted snapshots are first renamed out of the way and then removed; a store object
+is reclaimed once no snapshot links it any more (link count 1), without rescanning
+the snapshots that are kept.
+
+Example usage:
+```bash
+djgit_copylibs --dedup --keep-last 5 --keep-daily 7 --keep-weekly 4 --max-bytes 20G
+djgit_copylibs --gc-only --keep-last 3 --dry-run
+```
+"""
+import datetime
+import os
+import shutil
+import stat
+
+from . import filehash
+
+SNAPSHOT_ROOT = ".copylibs"
+STORE_DIR = ".store"
+HASH_CACHE = ".hashcache.json"
+TRASH_PREFIX = ".trash-"
+TIME_FORMAT = "%Y-%m-%d-%H-%M-%S"
+_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(text):
+    """Bytes from a size such as <code>500M</code>, <code>20G</code> or <code>1024</code>."""
+    text = text.strip().upper().rstrip("B")
+    unit = text[-1] if text and text[-1] in _UNITS else ""
+    return int(float(text[:len(text) - len(unit)]) * _UNITS[unit])
+
+
+class Store:
+    """
+    Content-addressed store of read-only files shared by hard links. Source digests
+    are cached by stat in <code>HASH_CACHE</code> next to the store (call
+    <code>save()</code> after copying), so unchanged files are not reread.
+    """
+
+    def __init__(self, root=os.path.join(SNAPSHOT_ROOT, STORE_DIR)):
+        self.root = root
+        self.cache = filehash.HashCache(os.path.join(os.path.dirname(root), HASH_CACHE))
+
+    def save(self):
+        self.cache.save()
+
+    def object_path(self, digest, executable=False):
+        return os.path.join(self.root, digest[:2], digest + ("x" if executable else ""))
+
+    def link_copy(self, src, dst, *, follow_symlinks=True):
+        """<code>shutil.copy2</code> replacement that links <code>dst</code> to the store object of <code>src</code>."""
+        executable = bool(os.stat(src).st_mode & stat.S_IXUSR)
+        obj = self.object_path(filehash.digest(src, self.cache), executable)
+        try:
+            if not os.path.exists(obj):
+                os.makedirs(os.path.dirname(obj), exist_ok=True)
+                tmp = f"{obj}.{os.getpid()}.tmp"
+                shutil.copy2(src, tmp)
+                os.chmod(tmp, 0o555 if executable else 0o444)
+                os.replace(tmp, obj)
+            os.link(obj, dst)
+        except OSError:
+            # sistema de ficheros sin enlaces duros (o límite de enlaces): copia normal
+            shutil.copy2(src, dst)
+        return dst
+
+    def sweep(self, dry_run=False):
+        """Remove objects no snapshot links any more. Returns <code>(files, bytes)</code>."""
+        files = size = 0
+        for root, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(root, name)
+                st = os.lstat(path)
+                if st.st_nlink == 1:
+                    files += 1
+                    size += st.st_size
+                    if not dry_run:
+                        os.remove(path)
+        return files, size
+
+
+def list_snapshots(root=SNAPSHOT_ROOT):
+    """<code>[(datetime, name), ...]</code> of the snapshots in <code>root</code>, oldest first."""
+    snapshots = []
+    if not os.path.isdir(root):
+        return snapshots
+    for entry in os.scandir(root):
+        if not entry.is_dir(follow_symlinks=False):
+            continue
+        try:
+            snapshots.append((datetime.datetime.strptime(entry.name, TIME_FORMAT), entry.name))
+        except ValueError:
+            pass  # .store, .trash-* u otras carpetas que no son snapshots
+    return sorted(snapshots)
+
+
+def _newest_per(snapshots, key, count):
+    keep, seen = set(), []
+    for when, name in reversed(snapshots):
+        period = key(when)
+        if period not in seen:
+            if len(seen) == count:
+                break
+            seen.append(period)
+            keep.add(name)
+    return keep
+
+
+def select_keep(snapshots, keep_last=None, keep_daily=None, keep_weekly=None):
+    """Names kept by the count-based policies (all of them if no policy is given)."""
+    if keep_last is None and keep_daily is None and keep_weekly is None:
+        return {name for _, name in snapshots}
+    keep = set()
+    if keep_last:
+        keep |= {name for _, name in snapshots[-keep_last:]}
+    if keep_daily:
+        keep |= _newest_per(snapshots, lambda t: t.date(), keep_daily)
+    if keep_weekly:
+        keep |= _newest_per(snapshots, lambda t: t.isocalendar()[:2], keep_weekly)
+    if snapshots:
+        keep.add(snapshots[-1][1])
+    return keep
+
+
+def _usage(root, names):
+    """<code>{name: {(dev, ino): size}}</code> of the regular files of each snapshot (one walk)."""
+    usage = {}
+    for name in names:
+        files = {}
+        for dirpath, _, filenames in os.walk(os.path.join(root, name)):
+            for file in filenames:
+                st = os.lstat(os.path.join(dirpath, file))
+                if stat.S_ISREG(st.st_mode):
+                    files[(st.st_dev, st.st_ino)] = st.st_size
+        usage[name] = files
+    return usage
+
+
+def plan_gc(root=SNAPSHOT_ROOT, keep_last=None, keep_daily=None, keep_weekly=None, max_bytes=None):
+    """
+    Snapshots to keep and to delete under the given policies. Returns a dict with
+    <code>keep</code> and <code>delete</code> (names, oldest first) and
+    <code>bytes_kept</code> (unique bytes of the kept snapshots, when
+    <code>max_bytes</code> is given).
+    """
+    snapshots = list_snapshots(root)
+    keep = select_keep(snapshots, keep_last, keep_daily, keep_weekly)
+    kept = [name for _, name in snapshots if name in keep]
+
+    bytes_kept = None
+    if max_bytes is not None:
+        usage = _usage(root, kept)
+        # referencias por inodo entre snapshots conservados: un fichero compartido
+        # solo se libera al borrar el último snapshot que lo enlaza
+        refs, sizes = {}, {}
+        for name in kept:
+            for inode, size in usage[name].items():
+                refs[inode] = refs.get(inode, 0) + 1
+                sizes[inode] = size
+        bytes_kept = sum(sizes.values())
+        while bytes_kept > max_bytes and len(kept) > 1:
+            oldest = kept.pop(0)
+            for inode in usage[oldest]:
+                refs[inode] -= 1
+                if refs[inode] == 0:
+                    bytes_kept -= sizes[inode]
+
+    kept_set = set(kept)
+    delete = [name for _, name in snapshots if name not in kept_set]
+    return {"keep": kept, "delete": delete, "bytes_kept": bytes_kept}
+
+
+def _rmtree(path):
+    def make_writable(func, p, _):
+        os.chmod(os.path.dirname(p), 0o755)
+        func(p)
+    shutil.rmtree(path, onerror=make_writable)
+
+
+def gc(root=SNAPSHOT_ROOT, keep_last=None, keep_daily=None, keep_weekly=None, max_bytes=None, dry_run=False):
+    """Apply the retention policies to <code>root</code> and reclaim unreferenced store objects."""
+    plan = plan_gc(root, keep_last, keep_daily, keep_weekly, max_bytes)
+    for name in plan["delete"]:
+        print(f"{'would delete' if dry_run else 'deleting'} {root}/{name}")
+        if not dry_run:
+            # renombrar es atómico: un fallo a mitad no deja un snapshot a medias visible
+            trash = os.path.join(root, TRASH_PREFIX + name)
+            os.rename(os.path.join(root, name), trash)
+            _rmtree(trash)
+    if not dry_run and os.path.isdir(root):
+        for entry in os.scandir(root):
+            if entry.name.startswith(TRASH_PREFIX):
+                _rmtree(entry.path)  # restos de una ejecución interrumpida
+
+    store = Store(os.path.join(root, STORE_DIR))
+    files, size = store.sweep(dry_run=dry_run) if os.path.isdir(store.root) else (0, 0)
+    if dry_run and plan["delete"]:
+        print("[INFO] Store objects freed by the deletions are only counted after a real run")
+    print(f"[OK] {len(plan['keep'])} snapshots kept, {len(plan['delete'])} "
+          f"{'to delete' if dry_run else 'deleted'}, {files} store objects ({size / 1e6:.1f} MB) "
+          f"{'reclaimable' if dry_run else 'reclaimed'}")
+    return plan
@@ -1,14 +1,102 @@
 import os
 import argparse
 
+BEGIN_MARK = "# >>> Custom PS1 config <<<"
+END_MARK = "# <<< Custom PS1 config >>>"
 
-def get_ps1(style: str) -> str:
-    """Returns the PS1 string according to the chosen style."""
+# Segmento git para el prompt, en bash puro: lee .git/HEAD (y packed-refs si HEAD está
+# separado) sin lanzar procesos. El estado "dirty" se guarda en <gitdir>/djgit_ps_dirty y
+# solo se recalcula (en segundo plano) cuando el index es más nuevo que esa cache.
+# Si el segmento tarda más de __djgit_ps_budget_ms (medido con $EPOCHREALTIME, bash >= 5)
+# se deja de mostrar en ese repositorio durante la sesión.
+GIT_SEGMENT = r'''declare -A __djgit_ps_slow
+__djgit_ps_gitdir() {
+    local d=$PWD line
+    while :; do
+        if [[ -d $d/.git ]]; then
+            __djgit_ps_dir=$d/.git; return 0
+        elif [[ -f $d/.git ]]; then
+            read -r line < "$d/.git" || return 1
+            line=${line#gitdir: }
+            [[ $line == /* ]] || line=$d/$line
+            __djgit_ps_dir=$line; return 0
+        fi
+        [[ -n $d ]] || return 1
+        d=${d%/*}
+    done
+}
+__djgit_ps_branch() {
+    local gd=$1 head common sha ref prev=""
+    read -r head < "$gd/HEAD" 2>/dev/null || return 1
+    if [[ $head == "ref: "* ]]; then
+        __djgit_ps_ref=${head#ref: }
+        __djgit_ps_ref=${__djgit_ps_ref#refs/heads/}
+        return 0
+    fi
+    __djgit_ps_ref=${head:0:7}
+    common=$gd
+    if [[ -f $gd/commondir ]]; then
+        read -r common < "$gd/commondir"
+        [[ $common == /* ]] || common=$gd/$common
+    fi
+    [[ -f $common/packed-refs ]] || return 0
+    while read -r sha ref; do
+        if [[ $sha == "$head" || $sha == "^$head" ]]; then
+            ref=${ref:-$prev}
+            __djgit_ps_ref="(${ref#refs/*/})"
+            return 0
+        fi
+        prev=$ref
+    done < "$common/packed-refs"
+}
+__djgit_ps_dirty_flag() {
+    local gd=$1 cache=$1/djgit_ps_dirty
+    __djgit_ps_flag=""
+    [[ -f $gd/index ]] || return
+    [[ -f $cache ]] && read -r __djgit_ps_flag < "$cache"
+    [[ -f $cache && ! $gd/index -nt $cache ]] && return
+    printf '%s\n' "$__djgit_ps_flag" 2>/dev/null > "$cache" || return
+    ( { git diff --no-ext-diff --quiet HEAD 2>/dev/null && echo || echo '*'; } > "$cache.tmp" \
+        && mv -f "$cache.tmp" "$cache" & )
+}
+__djgit_ps_update() {
+    local t0=${EPOCHREALTIME/[.,]/} gd
+    __djgit_ps_seg=""
+    __djgit_ps_gitdir || return
+    gd=$__djgit_ps_dir
+    [[ -n ${__djgit_ps_slow[$gd]} ]] && return
+    __djgit_ps_branch "$gd" || return
+    __djgit_ps_flag=""
+    (( __djgit_ps_dirty )) && __djgit_ps_dirty_flag "$gd"
+    if [[ -n $t0 ]] && (( (${EPOCHREALTIME/[.,]/} - t0) / 1000 > __djgit_ps_budget_ms )); then
+        __djgit_ps_slow[$gd]=1
+        return
+    fi
+    __djgit_ps_seg=" ($__djgit_ps_ref$__djgit_ps_flag)"
+}
+[[ $PROMPT_COMMAND == *__djgit_ps_update* ]] || PROMPT_COMMAND="__djgit_ps_update${PROMPT_COMMAND:+;$PROMPT_COMMAND}"'''
+
+
+def get_ps1(style: str, budget_ms: int = 20, dirty: bool = False) -> str:
+    """
+    Returns the PS1 string according to the chosen style. The <code>git</code> style
+    also returns the bash functions that compute the branch segment;
+    <code>budget_ms</code> and <code>dirty</code> only apply to it.
+    """
     styles = {
         "minimal": r'export PS1="(\u) \W\$ "',
         "classic": r'export PS1="(\u@\h) \w\$ "',
         "colorful": r'export PS1="(\[\033[01;33m\]${CONDA_DEFAULT_ENV}\[\033[0m\]) '
                     r'\[\033[01;32m\]\u\[\033[0m\]:\[\033[01;34m\]\W\[\033[0m\]\$ "',
+        "git": "\n".join([
+            f"__djgit_ps_budget_ms={int(budget_ms)}",
+            f"__djgit_ps_dirty={int(dirty)}",
+            GIT_SEGMENT,
+            # comillas simples: las variables se expanden en cada prompt
+            r"export PS1='(\[\033[01;33m\]${CONDA_DEFAULT_ENV}\[\033[0m\]) "
+            r"\[\033[01;32m\]\u\[\033[0m\]:\[\033[01;34m\]\W\[\033[0m\]"
+            r"\[\033[01;35m\]${__djgit_ps_seg}\[\033[0m\]\$ '",
+        ]),
     }
     if style not in styles:
         raise ValueError(f"Invalid style: {style}. Use {list(styles.keys())}")
@@ -27,13 +115,21 @@ def write_bashrc(ps1_line: str):
     else:
         lines = []
 
-    # Filter previous PS1
-    lines = [line for line in lines if not line.strip().startswith("export PS1=")]
+    # Filter previous configuration blocks and PS1
+    kept, inside = [], False
+    for line in lines:
+        if line.strip() == BEGIN_MARK:
+            inside = True
+        elif line.strip() == END_MARK:
+            inside = False
+        elif not inside and not line.strip().startswith("export PS1="):
+            kept.append(line)
+    lines = kept
 
     # Add new configuration
-    lines.append("\n# >>> Custom PS1 config <<<\n")
+    lines.append("\n" + BEGIN_MARK + "\n")
     lines.append(ps1_line + "\n")
-    lines.append("# <<< Custom PS1 config >>>\n")
+    lines.append(END_MARK + "\n")
 
     with open(bashrc, "w") as f:
         f.writelines(lines)
@@ -45,12 +141,16 @@ def write_bashrc(ps1_line: str):
 def main():
     parser = argparse.ArgumentParser(description="Configure PS1 in Bash with different styles.")
     parser.add_argument("--style", type=str, default="colorful",
-                        help="PS1 style: minimal, classic, colorful")
+                        help="PS1 style: minimal, classic, colorful, git")
     parser.add_argument("--apply", action="store_true",
                         help="If specified, writes the configuration to ~/.bashrc")
+    parser.add_argument("--budget-ms", type=int, default=20,
+                        help="git style: drop the git segment in repos where it takes longer than this")
+    parser.add_argument("--dirty", action="store_true",
+                        help="git style: show '*' for uncommitted changes (cached, refreshed when the index changes)")
     args = parser.parse_args()
 
-    ps1_line = get_ps1(args.style)
+    ps1_line = get_ps1(args.style, budget_ms=args.budget_ms, dirty=args.dirty)
 
     if args.apply:
         write_bashrc(ps1_line)
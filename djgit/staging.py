@@ -0,0 +1,174 @@
+"""
+Tree staging with hardlinks or reflinks instead of full copies.
+
+<code>stage_tree(src, dst)</code> makes <code>dst</code> mirror <code>src</code>: files
+already linked to their source are left alone, new or changed files are hardlinked
+(or reflinked), and entries that no longer exist in <code>src</code> are removed.
+When <code>src</code> and <code>dst</code> live on different filesystems, or the
+filesystem refuses links, files are copied instead.
+
+With <code>compare="hash"</code>, a copied file whose size matches but whose mtime
+differs (e.g. after a fresh checkout) is compared by content through
+<code>djgit.filehash</code> and kept if identical, instead of being copied again.
+
+Hardlinked files share their bytes with the source: anything that is going to be
+modified in place inside <code>dst</code> must first go through <code>break_link()</code>.
+"""
+import errno
+import os
+import shutil
+
+MODES = ("copy", "link", "reflink")
+
+# ioctl FICLONE de Linux (btrfs, xfs, ...)
+_FICLONE = 0x40049409
+
+
+def _reflink(src, dst):
+    import fcntl
+    with open(src, "rb") as fs, open(dst, "wb") as fd:
+        try:
+            fcntl.ioctl(fd.fileno(), _FICLONE, fs.fileno())
+        except OSError:
+            fd.close()
+            os.remove(dst)
+            raise
+    shutil.copystat(src, dst)
+
+
+def _same_file(src_st, dst):
+    try:
+        st = os.lstat(dst)
+    except FileNotFoundError:
+        return False
+    return (st.st_ino, st.st_dev) == (src_st.st_ino, src_st.st_dev)
+
+
+def _unchanged_copy(src_st, dst):
+    # copia previa (modo copy/reflink o fallback): mismo tamaño y mtime en ns, como
+    # filehash.HashCache; con segundos, una reescritura en el mismo segundo pasaba por igual
+    try:
+        st = os.lstat(dst)
+    except FileNotFoundError:
+        return False
+    return st.st_size == src_st.st_size and st.st_mtime_ns == src_st.st_mtime_ns
+
+
+def _remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+
+def _same_content(s, src_st, d, cache):
+    from .filehash import hash_files
+    try:
+        if os.lstat(d).st_size != src_st.st_size:
+            return False
+    except FileNotFoundError:
+        return False
+    digests = hash_files([s, d], cache=cache)
+    if digests[s] != digests[d]:
+        return False
+    shutil.copystat(s, d)  # la próxima vez basta con comparar tamaño y mtime
+    return True
+
+
+def stage_tree(src, dst, mode="link", compare="stat", hash_cache=None):
+    """
+        Synchronise <code>dst</code> with <code>src</code> using the cheapest available
+        strategy for each file.
+<table>
+  <thead>
+    <tr>
+      <th>Section</th>
+      <th>Description</th>
+    </tr>
+  </thead>
+  <tbody>
+    <tr>
+      <td><strong>Inputs</strong></td>
+      <td>
+        <code>src</code> (<em>str</em>): Source folder.<br>
+        <code>dst</code> (<em>str</em>): Target folder, created if missing.<br>
+        <code>mode</code> (<em>str</em>): <code>"link"</code> (hardlink, default), <code>"reflink"</code> (copy-on-write clone) or <code>"copy"</code>.<br>
+        <code>compare</code> (<em>str</em>): <code>"stat"</code> (size and mtime, default) or <code>"hash"</code> (also compare contents when the mtime differs).<br>
+        <code>hash_cache</code> (<em>filehash.HashCache</em>): Optional digest cache for <code>compare="hash"</code>.
+      </td>
+    </tr>
+    <tr>
+      <td><strong>Outputs</strong></td>
+      <td>
+        <em>dict</em>: Number of files <code>linked</code>, <code>reflinked</code>, <code>copied</code>, <code>unchanged</code> and <code>removed</code>.
+      </td>
+    </tr>
+  </tbody>
+</table>
+"""
+    if mode not in MODES:
+        raise ValueError(f"Invalid mode: {mode}. Use {list(MODES)}")
+    if compare not in ("stat", "hash"):
+        raise ValueError(f"Invalid compare: {compare}. Use ['stat', 'hash']")
+
+    stats = {"linked": 0, "reflinked": 0, "copied": 0, "unchanged": 0, "removed": 0}
+    os.makedirs(dst, exist_ok=True)
+
+    # hardlinks y reflinks solo funcionan dentro del mismo sistema de ficheros
+    if mode != "copy" and os.stat(src).st_dev != os.stat(dst).st_dev:
+        mode = "copy"
+
+    for folder, dirs, files in os.walk(src):
+        rel = os.path.relpath(folder, src)
+        target = os.path.normpath(os.path.join(dst, rel))
+        os.makedirs(target, exist_ok=True)
+
+        # eliminar lo que ya no existe en src
+        wanted = set(dirs) | set(files)
+        for entry in os.listdir(target):
+            if entry not in wanted:
+                _remove(os.path.join(target, entry))
+                stats["removed"] += 1
+        for d in dirs:
+            t = os.path.join(target, d)
+            if os.path.lexists(t) and not os.path.isdir(t):
+                os.remove(t)
+
+        for file in files:
+            s = os.path.join(folder, file)
+            d = os.path.join(target, file)
+            st = os.stat(s)
+            if (_same_file(st, d) or _unchanged_copy(st, d)
+                    or (compare == "hash" and _same_content(s, st, d, hash_cache))):
+                stats["unchanged"] += 1
+                continue
+            if os.path.lexists(d):
+                _remove(d)
+
+            if mode == "link":
+                try:
+                    os.link(s, d)
+                    stats["linked"] += 1
+                    continue
+                except OSError as e:
+                    if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                        raise
+            if mode in ("link", "reflink"):
+                try:
+                    _reflink(s, d)
+                    stats["reflinked"] += 1
+                    continue
+                except (OSError, ImportError):
+                    pass
+            shutil.copy2(s, d)
+            stats["copied"] += 1
+
+    return stats
+
+
+def break_link(path):
+    """Give a hardlinked file its own copy so it can be modified without touching the source."""
+    if os.stat(path).st_nlink > 1:
+        tmp = path + ".djgit-tmp"
+        shutil.copy2(path, tmp)
+        os.replace(tmp, path)
@@ -1,10 +1,15 @@
 import json,os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .gitexec import GitError, run_git
+
+# Segundos que se reutiliza la informacion del remoto guardada en .git
+REMOTE_CACHE_TTL = 60
+REMOTE_CACHE_FILE = "djgit_remote_cache.json"
 
 def list_remote_branches(repo_url):
     # Ejecutar el comando 'git ls-remote --heads' para listar las ramas remotas
-    command = f'git ls-remote --heads {repo_url}'
-    stream = os.popen(command)
-    output = stream.read()
+    output = run_git(["ls-remote", "--heads", repo_url]).stdout
 
     # Procesar la salida para extraer los nombres de las ramas
     branches = []
@@ -20,29 +25,226 @@ def list_remote_branches(repo_url):
 
 def create_deploy_branch(repo_url):
     # Crear la rama 'deploy' en el repositorio remoto
-    command = f'git push {repo_url} HEAD:refs/heads/deploy'
-    stream = os.popen(command)
-    output = stream.read()
-    print(output)
+    res = run_git(["push", repo_url, "HEAD:refs/heads/deploy"])
+    print(res.stdout)
+    if not res.ok:
+        print(f"[ERROR] git push ({res.returncode}): {res.stderr.strip()}")
+    # las refs cacheadas de este remoto ya no son validas
+    RemoteInfo.invalidate(repo_url)
+    return res
 
 def clonar_deploy_branch(repo_url):
     # Clonar la rama 'deploy' del repositorio remoto
-    command = f'git clone -b deploy {repo_url} .repo_deploy'
-    stream = os.popen(command)
-    output = stream.read()
+    res = run_git(["clone", "-b", "deploy", repo_url, ".repo_deploy"])
+    print(res.stdout)
+    if not res.ok:
+        print(f"[ERROR] git clone ({res.returncode}): {res.stderr.strip()}")
+    return res
+
+def _first_remote_url():
+    # Primera linea de 'git remote -v': "origin\t<url> (fetch)"
+    output = run_git(["remote", "-v"], check=True).stdout
+    return output.split("\n")[0].split("\t")[1].split(" ")[0]
+
+
+def _find_git_dir(start="."):
+    # Sube por el arbol de carpetas hasta encontrar .git (carpeta o fichero de worktree)
+    path = os.path.abspath(start)
+    while True:
+        candidate = os.path.join(path, ".git")
+        if os.path.isdir(candidate):
+            return candidate
+        if os.path.isfile(candidate):
+            with open(candidate) as f:
+                line = f.read().strip()
+            if line.startswith("gitdir:"):
+                return os.path.join(path, line[len("gitdir:"):].strip())
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+class RemoteInfo:
+    """
+    Remote URL, refs and deploy-branch SHA of a repository, fetched in a
+    single <code>git ls-remote</code> round trip and cached for
+    <code>REMOTE_CACHE_TTL</code> seconds in <code>.git/djgit_remote_cache.json</code>.
+
+    Example usage:
+    ```python
+    info = RemoteInfo.for_repo()
+    info.url, info.name, info.branches, info.deploy_sha
+    ```
+    """
+
+    def __init__(self, url, refs, fetched_at=None, deploy_branch="deploy"):
+        self.url = url
+        self.refs = dict(refs)
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        self.deploy_branch = deploy_branch
+
+    @property
+    def name(self):
+        return self.url.rstrip("/").split("/")[-1].replace(".git", "")
+
+    @property
+    def branches(self):
+        return [ref[len("refs/heads/"):] for ref in self.refs if ref.startswith("refs/heads/")]
+
+    @property
+    def deploy_sha(self):
+        return self.refs.get("refs/heads/" + self.deploy_branch)
+
+    def __repr__(self):
+        return f"RemoteInfo({self.url!r}, branches={self.branches!r})"
+
+    def has_branch(self, branch):
+        return ("refs/heads/" + branch) in self.refs
+
+    def to_dict(self):
+        return {"url": self.url, "refs": self.refs, "fetched_at": self.fetched_at}
+
+    # ---------- cache ----------
+
+    @staticmethod
+    def _cache_path():
+        git_dir = _find_git_dir()
+        if git_dir is None:
+            return None
+        return os.path.join(git_dir, REMOTE_CACHE_FILE)
+
+    # Copia en memoria del fichero de cache: {ruta: (mtime_ns, json)}; un proceso
+    # de larga vida (djgit.daemon) no vuelve a leerlo mientras no cambie
+    _memory = {}
+
+    @classmethod
+    def _load_cache(cls):
+        path = cls._cache_path()
+        if path is None:
+            return {}
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return {}
+        hit = cls._memory.get(path)
+        if hit and hit[0] == mtime:
+            return json.loads(hit[1])
+        try:
+            with open(path) as f:
+                text = f.read()
+            cache = json.loads(text)
+        except (OSError, ValueError):
+            return {}
+        cls._memory[path] = (mtime, text)
+        return cache
+
+    @classmethod
+    def _save_cache(cls, cache):
+        path = cls._cache_path()
+        if path is None:
+            return
+        tmp = path + ".tmp"
+        try:
+            text = json.dumps(cache, indent=2)
+            with open(tmp, "w") as f:
+                f.write(text)
+            os.replace(tmp, path)
+            cls._memory[path] = (os.stat(path).st_mtime_ns, text)
+        except OSError:
+            pass
+
+    @classmethod
+    def invalidate(cls, url=None):
+        """Forget the cached refs of <code>url</code> (or of every remote if omitted)."""
+        cache = cls._load_cache()
+        if url is None:
+            cache = {}
+        else:
+            cache.get("remotes", {}).pop(url, None)
+        cls._save_cache(cache)
+
+    # ---------- queries ----------
+
+    @staticmethod
+    def _ls_remote(url):
+        # Una sola llamada devuelve HEAD, ramas y tags con sus hashes; None si el remoto
+        # no responde (inaccesible, sin permisos): los llamadores ven refs vacías, como antes
+        try:
+            res = run_git(["ls-remote", url], check=True)
+        except (GitError, OSError) as e:
+            print(f"[WARN] git ls-remote {url}: {e}")
+            return None
+        refs = {}
+        for line in res.lines():
+            parts = line.split()
+            if len(parts) == 2:
+                refs[parts[1]] = parts[0]
+        return refs
+
+    @classmethod
+    def fetch(cls, url, ttl=REMOTE_CACHE_TTL, deploy_branch="deploy"):
+        """Return the refs of <code>url</code>, from the cache if younger than <code>ttl</code> seconds."""
+        return cls.fetch_many([url], ttl=ttl, deploy_branch=deploy_branch)[url]
+
+    @classmethod
+    def fetch_many(cls, urls, ttl=REMOTE_CACHE_TTL, deploy_branch="deploy", max_workers=8):
+        """
+        Query several remotes at once. Cached entries younger than <code>ttl</code>
+        are reused, the rest are fetched concurrently and written back to the cache.
+        Returns a dict <code>{url: RemoteInfo}</code>.
+        """
+        cache = cls._load_cache()
+        remotes = cache.setdefault("remotes", {})
+        now = time.time()
+
+        result = {}
+        missing = []
+        for url in urls:
+            entry = remotes.get(url)
+            if entry and now - entry["fetched_at"] < ttl:
+                result[url] = cls(url, entry["refs"], entry["fetched_at"], deploy_branch)
+            elif url not in missing:
+                missing.append(url)
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as pool:
+                fetched = list(pool.map(cls._ls_remote, missing))
+            for url, refs in zip(missing, fetched):
+                info = cls(url, refs or {}, now, deploy_branch)
+                if refs is not None:
+                    remotes[url] = info.to_dict()  # los fallos no se cachean
+                result[url] = info
+            cls._save_cache(cache)
+
+        return result
+
+    @classmethod
+    def origin_url(cls, ttl=REMOTE_CACHE_TTL):
+        """URL of the first remote of the current repository (cached like the refs)."""
+        cache = cls._load_cache()
+        origin = cache.get("origin")
+        if origin and time.time() - origin["fetched_at"] < ttl:
+            return origin["url"]
+        url = _first_remote_url()
+        cache = cls._load_cache()
+        cache["origin"] = {"url": url, "fetched_at": time.time()}
+        cls._save_cache(cache)
+        return url
+
+    @classmethod
+    def for_repo(cls, ttl=REMOTE_CACHE_TTL, deploy_branch="deploy"):
+        """RemoteInfo of the current repository's first remote."""
+        return cls.fetch(cls.origin_url(ttl=ttl), ttl=ttl, deploy_branch=deploy_branch)
 
-    print(output)
 
 def get_repo_name():
-    stream = os.popen('git remote -v')
-    output = stream.read()
-    repo_url =  output.split("\n")[0].split("\t")[1].split(" ")[0]
-    name = repo_url.split("/")[-1].replace(".git","")
-    return repo_url,name
+    # url cacheada en .git (ver RemoteInfo.origin_url); el nombre como RemoteInfo.name
+    repo_url = RemoteInfo.origin_url()
+    return repo_url, RemoteInfo(repo_url, {}).name
 
-import os,shutil
 
-def createsetup(repo_name,package_data={}):
+def createsetup(repo_name,package_data={},target_path="."):
 
     setup_lines = """  
 from setuptools import setup, find_packages
@@ -85,6 +287,6 @@ setup(
     #     "djccx": ["djccx/bin/*", "djccx/data/*.lmp", "djccx/data/*.table"],
     #     }
 
-    with open( "setup.py", "w") as f:
+    with open(os.path.join(target_path, "setup.py"), "w") as f:
         f.write(setup_lines)
         print(f"File setup.py created with success")
\ No newline at end of file
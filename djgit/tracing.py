@@ -0,0 +1,180 @@
+"""
+Stage instrumentation for deploy, npm_deploy and copylibs.
+
+Tracing is off unless <code>DJGIT_TRACE=&lt;file&gt;</code> is set in the environment
+or <code>enable(&lt;file&gt;)</code> is called. A <code>.json</code> file gets Chrome
+trace-event output (open it in <code>chrome://tracing</code> or Perfetto); any other
+extension gets one JSON object per line. When disabled, <code>stage()</code> returns a
+shared no-op object and the copy helpers call <code>shutil</code> directly.
+
+Example usage:
+```bash
+DJGIT_TRACE=deploy_trace.json python scripts/deploy.py
+```
+"""
+import atexit
+import json
+import os
+import shutil
+import threading
+import time
+
+ENV_VAR = "DJGIT_TRACE"
+
+_sink = None
+
+
+class _Sink:
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self.lock = threading.Lock()
+        self.first = True
+        # sin ']' final: el formato JSON Array de Chrome lo permite
+        self.f = open(path, "w", encoding="utf-8")
+        if fmt == "chrome":
+            self.f.write("[\n")
+        self.f.flush()
+
+    def write(self, record):
+        if self.fmt == "chrome":
+            args = {k: v for k, v in record.items() if k not in ("name", "ts", "wall", "pid", "tid")}
+            event = {
+                "name": record["name"], "ph": "X", "cat": "djgit",
+                "ts": record["ts"] * 1e6, "dur": record["wall"] * 1e6,
+                "pid": record["pid"], "tid": record["tid"], "args": args,
+            }
+            text = json.dumps(event)
+        else:
+            text = json.dumps(record) + "\n"
+        with self.lock:
+            # la coma depende de self.first: se decide dentro del lock (etapas en paralelo)
+            line = text if self.fmt != "chrome" or self.first else ",\n" + text
+            self.f.write(line)
+            self.f.flush()
+            self.first = False
+
+    def close(self):
+        with self.lock:
+            if self.fmt == "chrome":
+                self.f.write("\n]\n")
+            self.f.close()
+
+
+def enable(path, fmt=None):
+    """Start writing stage records to <code>path</code> (<code>fmt</code>: 'chrome' or 'jsonl', guessed from the extension)."""
+    global _sink
+    disable()
+    if fmt is None:
+        fmt = "chrome" if path.endswith(".json") else "jsonl"
+    _sink = _Sink(path, fmt)
+
+
+def disable():
+    global _sink
+    if _sink is not None:
+        _sink.close()
+        _sink = None
+
+
+def enabled():
+    return _sink is not None
+
+
+def _process_cpu():
+    # todo el proceso (y sus hijos terminados): incluye otras etapas que corran a la vez
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class _Span:
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.bytes = 0
+        self.files = 0
+
+    def add(self, bytes=0, files=0):
+        self.bytes += bytes
+        self.files += files
+
+    def __enter__(self):
+        self.ts = time.time()
+        self.t0 = time.perf_counter()
+        self.c0 = _process_cpu()
+        self.tc0 = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record = {
+            "name": self.name,
+            "ts": self.ts,
+            "wall": time.perf_counter() - self.t0,
+            "process_cpu": _process_cpu() - self.c0,
+            "thread_cpu": time.thread_time() - self.tc0,
+            "bytes": self.bytes,
+            "files": self.files,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        record.update(self.args)
+        sink = _sink
+        if sink is not None:
+            sink.write(record)
+        return False
+
+
+class _NullSpan:
+    def add(self, bytes=0, files=0):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+def stage(name, **args):
+    """
+    Context manager timing one stage: wall time, <code>thread_cpu</code> (CPU of the
+    calling thread only) and <code>process_cpu</code> (whole process plus finished child
+    processes such as git or setup.py, so it also counts stages running concurrently).
+    The yielded span accepts <code>span.add(bytes=..., files=...)</code>.
+    """
+    if _sink is None:
+        return _NULL
+    return _Span(name, args)
+
+
+def copy(src, dst, span=None, copy_function=shutil.copy):
+    """<code>shutil.copy</code> that adds the copied bytes to <code>span</code> when tracing."""
+    res = copy_function(src, dst)
+    if span is not None and _sink is not None:
+        span.add(bytes=os.path.getsize(res), files=1)
+    return res
+
+
+def copytree(src, dst, span=None, **kwargs):
+    """<code>shutil.copytree</code> that adds copied bytes and files to <code>span</code> when tracing."""
+    if span is None or _sink is None:
+        return shutil.copytree(src, dst, **kwargs)
+    copy_function = kwargs.pop("copy_function", shutil.copy2)
+
+    def counting_copy(s, d, *, follow_symlinks=True):
+        res = copy_function(s, d, follow_symlinks=follow_symlinks)
+        span.add(bytes=os.path.getsize(res), files=1)
+        return res
+
+    return shutil.copytree(src, dst, copy_function=counting_copy, **kwargs)
+
+
+atexit.register(disable)
+
+if os.environ.get(ENV_VAR):
+    enable(os.environ[ENV_VAR])
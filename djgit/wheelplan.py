@@ -0,0 +1,314 @@
+"""
+Install planner for project requirements: resolve once, fetch in parallel, install offline.
+
+1) <code>lock</code>: resolves the full dependency set of <code>requirements.txt</code> with
+   <code>pip install --dry-run --report</code> and writes pinned lines to
+   <code>requirements.lock</code> (VCS requirements are pinned to their commit).
+2) <code>fetch</code>: builds/downloads one wheel per pinned line into the wheelhouse with
+   a thread pool; wheels already in the wheelhouse are reused. Index packages are found
+   by name and version; VCS and direct-URL lines get their own
+   <code>direct/&lt;hash of the line&gt;</code> subfolder, so moving a pin to another commit
+   or URL builds a new wheel instead of reusing the old one.
+3) <code>install</code>: installs all the wheel files with a single
+   <code>pip install --no-index --no-deps</code>, so no network access is needed.
+
+When the lock is up to date and every wheel is present, <code>sync</code> runs fully offline.
+An offline <code>lock</code> cannot clone VCS requirements: it keeps their pin from the
+previous lock and resolves them from the <code>direct/</code> wheels, and stops with an
+error if one is missing.
+
+Example usage:
+```bash
+djgit_wheels sync -r requirements.txt --wheelhouse ~/.djgit/wheelhouse
+```
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+
+WHEELHOUSE = os.environ.get("DJGIT_WHEELHOUSE",
+                            os.path.join(os.path.expanduser("~"), ".djgit", "wheelhouse"))
+LOCK_HEADER = "# djgit-lock requirements-sha256="
+
+
+def _canonical(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _requirements_hash(requirements_path):
+    with open(requirements_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _pip(python, *args):
+    return [python, "-m", "pip", *args]
+
+
+def _run(cmd, check=False):
+    # subprocess y concurrent.futures se importan al usarse: --help no los necesita
+    import subprocess
+    return subprocess.run(cmd, check=check)
+
+
+def _lock_line(item):
+    name = item["metadata"]["name"]
+    version = item["metadata"]["version"]
+    info = item.get("download_info", {})
+    vcs = info.get("vcs_info")
+    if vcs:
+        return f"{name} @ {vcs['vcs']}+{info['url']}@{vcs['commit_id']}", name, version
+    if item.get("is_direct"):
+        return f"{name} @ {info['url']}", name, version
+    return f"{name}=={version}", name, version
+
+
+def read_lock(lock_path):
+    """<code>[(line, name, version), ...]</code> of a lock written by <code>lock()</code>."""
+    entries = []
+    with open(lock_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            spec, _, meta = line.partition("  # ")
+            name, _, version = meta.partition("==")
+            entries.append((spec, name, version))
+    return entries
+
+
+def lock_is_current(requirements_path, lock_path):
+    if not os.path.exists(lock_path):
+        return False
+    with open(lock_path) as f:
+        header = f.readline().strip()
+    return header == LOCK_HEADER + _requirements_hash(requirements_path)
+
+
+_VCS_PREFIXES = ("git+", "hg+", "svn+", "bzr+")
+
+
+def _direct_requirements(requirements_path):
+    """<code>[(line, name, marker), ...]</code> of the VCS / direct-URL lines of a requirements file."""
+    direct = []
+    with open(requirements_path) as f:
+        for raw in f:
+            line = raw.split(" #", 1)[0].strip()
+            editable = line.startswith(("-e ", "--editable "))
+            if editable:
+                line = line.split(None, 1)[1].strip()
+            if not line or line.startswith(("#", "-")):
+                continue
+            req, sep, marker = line.partition(";")
+            if " @ " in req:
+                name = re.split(r"[\s\[@]", req, 1)[0]
+            elif req.startswith(_VCS_PREFIXES):
+                egg = re.search(r"[#&]egg=([\w.-]+)", req)
+                name = egg.group(1) if egg else None
+            else:
+                continue
+            direct.append((raw.strip(), name, sep + marker))
+    return direct
+
+
+def _offline_direct(requirements_path, lock_path, wheelhouse):
+    """
+    For an offline lock: pip cannot clone or download VCS / direct-URL requirements, so
+    each one is replaced by the wheel that <code>fetch</code> built for it in
+    <code>direct/</code>, found through its entry in the previous lock. Returns
+    <code>(replacements {line: wheel line}, pins {canonical name: lock entry})</code>;
+    raises <code>RuntimeError</code> when a requirement has no such wheel.
+    """
+    direct = _direct_requirements(requirements_path)
+    if not direct:
+        return {}, {}
+    previous = {}
+    if os.path.exists(lock_path):
+        previous = {_canonical(name): (spec, name, version)
+                    for spec, name, version in read_lock(lock_path) if " @ " in spec}
+    replacements, pins, missing = {}, {}, []
+    indexes = {}
+    for line, name, marker in direct:
+        entry = previous.get(_canonical(name)) if name else None
+        wheel = _find_wheel(indexes, wheelhouse, entry) if entry else None
+        if wheel is None:
+            missing.append(line)
+            continue
+        replacements[line] = wheel + marker
+        pins[_canonical(name)] = entry
+    if missing:
+        raise RuntimeError(
+            "Offline mode cannot resolve VCS/direct-URL requirements without a wheel built "
+            f"from a previous lock in {os.path.join(wheelhouse, 'direct')}: {missing}. "
+            "Run 'djgit_wheels sync' once with network access.")
+    return replacements, pins
+
+
+def lock(requirements_path="requirements.txt", lock_path="requirements.lock",
+         wheelhouse=WHEELHOUSE, offline=False, python=sys.executable):
+    """
+    Resolve <code>requirements_path</code> once and write the pinned set to <code>lock_path</code>.
+    Offline, VCS and direct-URL requirements keep the pin of the previous lock and resolve
+    from its <code>direct/</code> wheel (see <code>_offline_direct</code>).
+    """
+    import tempfile
+    replacements, pins = _offline_direct(requirements_path, lock_path, wheelhouse) if offline else ({}, {})
+    with tempfile.TemporaryDirectory() as tmp:
+        report = os.path.join(tmp, "report.json")
+        requirements = requirements_path
+        if replacements:
+            # copia junto al original (las rutas y -r relativos siguen valiendo) con las
+            # lineas directas cambiadas por la ruta de su rueda
+            requirements = os.path.join(os.path.dirname(os.path.abspath(requirements_path)),
+                                        f".{os.path.basename(requirements_path)}.offline-{os.getpid()}")
+            with open(requirements_path) as src, open(requirements, "w") as dst:
+                for raw in src:
+                    dst.write(replacements.get(raw.strip(), raw.rstrip("\n")) + "\n")
+        args = ["install", "--dry-run", "--ignore-installed", "--quiet",
+                "--report", report, "-r", requirements]
+        if offline:
+            args += ["--no-index", "--find-links", wheelhouse]
+        try:
+            _run(_pip(python, *args), check=True)
+        finally:
+            if requirements != requirements_path:
+                os.remove(requirements)
+        with open(report) as f:
+            items = json.load(f)["install"]
+
+    lines = sorted((pins.get(_canonical(item["metadata"]["name"])) or _lock_line(item) for item in items),
+                   key=lambda e: _canonical(e[1]))
+    with open(lock_path, "w") as f:
+        f.write(LOCK_HEADER + _requirements_hash(requirements_path) + "\n")
+        for spec, name, version in lines:
+            # nombre y version al final para localizar la rueda sin red
+            f.write(f"{spec}  # {name}=={version}\n")
+    print(f"[OK] {len(lines)} packages pinned in {lock_path}")
+    return lines
+
+
+def _wheel_dir(wheelhouse, spec):
+    """Folder holding the wheel of a lock line: the wheelhouse itself for <code>name==version</code>,
+    <code>direct/&lt;sha256 of the line&gt;</code> for VCS (pinned to a commit) and direct-URL lines."""
+    if " @ " not in spec:
+        return wheelhouse
+    return os.path.join(wheelhouse, "direct", hashlib.sha256(spec.encode()).hexdigest()[:16])
+
+
+def _wheel_index(folder):
+    index = {}
+    if os.path.isdir(folder):
+        for file in os.listdir(folder):
+            if file.endswith(".whl"):
+                # nombre y version son los dos primeros campos (PEP 427: sin '-' dentro)
+                name, version = file.split("-")[:2]
+                index[(_canonical(name), version)] = os.path.join(folder, file)
+    return index
+
+
+def _find_wheel(indexes, wheelhouse, entry):
+    spec, name, version = entry
+    folder = _wheel_dir(wheelhouse, spec)
+    if folder not in indexes:
+        indexes[folder] = _wheel_index(folder)
+    if folder == wheelhouse:
+        return indexes[folder].get((_canonical(name), version))
+    # la carpeta es propia de la línea: vale cualquier rueda del paquete
+    matches = [path for (n, _), path in indexes[folder].items() if n == _canonical(name)]
+    return matches[0] if matches else None
+
+
+def fetch(lock_path="requirements.lock", wheelhouse=WHEELHOUSE, jobs=8,
+          offline=False, python=sys.executable):
+    """
+    Make sure the wheelhouse holds a wheel for every entry of <code>lock_path</code>,
+    building/downloading the missing ones in parallel. Returns the list of wheel paths.
+    """
+    os.makedirs(wheelhouse, exist_ok=True)
+    entries = read_lock(lock_path)
+    indexes = {}
+    missing = [e for e in entries if _find_wheel(indexes, wheelhouse, e) is None]
+
+    if missing and offline:
+        names = ", ".join(spec for spec, _, _ in missing)
+        raise RuntimeError(f"Offline mode: wheels missing from {wheelhouse}: {names}")
+
+    def build_wheel(entry):
+        spec = entry[0]
+        folder = _wheel_dir(wheelhouse, spec)
+        os.makedirs(folder, exist_ok=True)
+        res = _run(_pip(python, "wheel", "--no-deps", "--quiet", "-w", folder, spec))
+        return spec, res.returncode
+
+    if missing:
+        from concurrent.futures import ThreadPoolExecutor
+        print(f"Fetching {len(missing)} of {len(entries)} wheels ({jobs} jobs)")
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            failed = [spec for spec, code in pool.map(build_wheel, missing) if code != 0]
+        if failed:
+            raise RuntimeError(f"Could not fetch: {failed}")
+        indexes = {}
+    else:
+        print(f"[OK] All {len(entries)} wheels already in {wheelhouse}")
+
+    wheels = []
+    for entry in entries:
+        wheel = _find_wheel(indexes, wheelhouse, entry)
+        if wheel is None:
+            raise RuntimeError(f"No wheel for {entry[0]} in {wheelhouse}")
+        wheels.append(wheel)
+    return wheels
+
+
+def install(wheels, python=sys.executable):
+    """
+    Install <code>wheels</code> without index or dependency resolution. A single pip
+    process installs them all: parallel pip runs into the same site-packages race on
+    shared files (RECORD, <code>__pycache__</code>, entry-point scripts).
+    """
+    if not wheels:
+        return
+    if _run(_pip(python, "install", "--no-index", "--no-deps", "--quiet", *wheels)).returncode:
+        raise RuntimeError("pip install failed")
+    print(f"[OK] Installed {len(wheels)} wheels")
+
+
+def sync(requirements_path="requirements.txt", lock_path="requirements.lock",
+         wheelhouse=WHEELHOUSE, jobs=8, offline=False, python=sys.executable):
+    """Lock (if requirements changed), fetch and install."""
+    if not lock_is_current(requirements_path, lock_path):
+        lock(requirements_path, lock_path, wheelhouse, offline, python)
+    else:
+        print(f"[OK] {lock_path} is up to date")
+    wheels = fetch(lock_path, wheelhouse, jobs, offline, python)
+    install(wheels, python)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve, fetch and install requirements through a local wheelhouse.")
+    parser.add_argument("command", choices=["lock", "fetch", "install", "sync"],
+                        help="lock: write requirements.lock; fetch: fill the wheelhouse; "
+                             "install: install the locked wheels; sync: all three")
+    parser.add_argument("-r", "--requirements", default="requirements.txt", help="Requirements file")
+    parser.add_argument("--lock", default="requirements.lock", help="Pinned lock file")
+    parser.add_argument("--wheelhouse", default=WHEELHOUSE, help="Local wheel cache ($DJGIT_WHEELHOUSE)")
+    parser.add_argument("--jobs", type=int, default=8, help="Parallel wheel downloads/builds")
+    parser.add_argument("--offline", action="store_true", help="Use only the wheelhouse, no network")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter to install into")
+    args = parser.parse_args()
+
+    if args.command == "lock":
+        lock(args.requirements, args.lock, args.wheelhouse, args.offline, args.python)
+    elif args.command == "fetch":
+        fetch(args.lock, args.wheelhouse, args.jobs, args.offline, args.python)
+    elif args.command == "install":
+        wheels = fetch(args.lock, args.wheelhouse, args.jobs, True, args.python)
+        install(wheels, args.python)
+    else:
+        sync(args.requirements, args.lock, args.wheelhouse, args.jobs, args.offline, args.python)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,15 @@
 #!/usr/bin/env python3
 import argparse
+import hashlib
 import os
-import platform
-import shlex
-import subprocess
 import sys
+import threading
 
 # ---------- utilidades ----------
 def run(cmd, apply=False):
     print("→", cmd)
     if apply:
+        import subprocess
         subprocess.run(cmd, shell=True, check=True)
 
 def read_os_release():
@@ -34,40 +34,224 @@ def detect_family_and_codename(override_codename=None):
 def require_root():
     if os.geteuid() != 0:
         print("⚠️  Se requieren privilegios de administrador para instalar paquetes.")
+        import shlex
         print("    Vuelve a ejecutar con: sudo", " ".join(map(shlex.quote, sys.argv)))
         sys.exit(1)
 
 def check_wine():
+    import subprocess
     try:
         out = subprocess.check_output(["bash","-lc","wine --version"], stderr=subprocess.STDOUT, text=True, timeout=5)
         return out.strip()
     except Exception:
         return None
 
-# ---------- comandos ----------
-def add_architecture(apply):
-    run("dpkg --add-architecture i386", apply)
+# ---------- ejecución de comandos ----------
+KEYRING_DIR = "/etc/apt/keyrings"
+KEY_PATH = f"{KEYRING_DIR}/winehq-archive.key"
+KEY_URL = "https://dl.winehq.org/wine-builds/winehq.key"
+APT_LISTS = "/var/lib/apt/lists"
 
-def add_key_and_repo_ubuntu(codename, apply):
-    run('mkdir -p /etc/apt/keyrings', apply)
-    run('wget -qO /etc/apt/keyrings/winehq-archive.key https://dl.winehq.org/wine-builds/winehq.key', apply)
-    repo = f'deb [signed-by=/etc/apt/keyrings/winehq-archive.key] https://dl.winehq.org/wine-builds/ubuntu/ {codename} main'
-    run(f'bash -lc \'echo "{repo}" > /etc/apt/sources.list.d/winehq-{codename}.list\'', apply)
+class ShellRunner:
+    """
+    Runs the plan on this machine. <code>query</code> (read-only checks) always runs;
+    <code>run</code>/<code>write_file</code> only print the action unless <code>apply</code>.
+    """
+    def __init__(self, apply=False):
+        self.apply = apply
+        self.dry_run = not apply
+        self._lock = threading.Lock()
 
-def add_key_and_repo_debian(codename, apply):
-    run('mkdir -p /etc/apt/keyrings', apply)
-    run('wget -qO /etc/apt/keyrings/winehq-archive.key https://dl.winehq.org/wine-builds/winehq.key', apply)
-    repo = f'deb [signed-by=/etc/apt/keyrings/winehq-archive.key] https://dl.winehq.org/wine-builds/debian/ {codename} main'
-    run(f'bash -lc \'echo "{repo}" > /etc/apt/sources.list.d/winehq-{codename}.list\'', apply)
+    def _say(self, text):
+        with self._lock:
+            print("→", text)
 
-def apt_update(apply):
-    run("apt-get update", apply)
+    def query(self, cmd):
+        import subprocess
+        try:
+            res = subprocess.run(cmd, capture_output=True, text=True)
+        except OSError:
+            return 127, ""
+        return res.returncode, res.stdout
 
-def install_wine(branch, apply, recommends):
+    def read_file(self, path):
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def glob(self, pattern):
+        import glob
+        return glob.glob(pattern)
+
+    def run(self, cmd):
+        import shlex
+        self._say(" ".join(map(shlex.quote, cmd)))
+        if self.apply:
+            import subprocess
+            subprocess.run(cmd, check=True)
+
+    def write_file(self, path, data):
+        self._say(f"write {path}")
+        if self.apply:
+            with open(path, "wb") as f:
+                f.write(data)
+
+class FakeRunner:
+    """
+    Runner for dry-runs and tests: <code>queries</code> maps a command tuple to
+    <code>(returncode, stdout)</code>, <code>files</code> maps paths to bytes. Actions are
+    only recorded in <code>commands</code> (and written files in <code>files</code>).
+    With <code>dry_run</code> (the default) a download that is not in <code>files</code>
+    is not verified, as with <code>ShellRunner</code> without <code>apply</code>.
+    """
+    def __init__(self, queries=None, files=None, dry_run=True):
+        self.queries = {tuple(k): v for k, v in (queries or {}).items()}
+        self.files = dict(files or {})
+        self.dry_run = dry_run
+        self.commands = []
+        self._lock = threading.Lock()
+
+    def query(self, cmd):
+        return self.queries.get(tuple(cmd), (1, ""))
+
+    def read_file(self, path):
+        return self.files.get(path)
+
+    def glob(self, pattern):
+        import fnmatch
+        return [p for p in self.files if fnmatch.fnmatch(p, pattern)]
+
+    def run(self, cmd):
+        with self._lock:
+            self.commands.append(list(cmd))
+
+    def write_file(self, path, data):
+        with self._lock:
+            self.commands.append(["write", path])
+            self.files[path] = data
+
+# ---------- plan ----------
+class Step:
+    """
+    One step of the install plan. <code>check(runner, status)</code> returns True when
+    the step is already satisfied (<code>status</code>: state of the steps it runs
+    <code>after</code>); otherwise <code>action(runner)</code> runs.
+    """
+    def __init__(self, name, check, action, after=()):
+        self.name = name
+        self.check = check
+        self.action = action
+        self.after = tuple(after)
+
+def sources_line(family, codename):
+    if family not in {"ubuntu", "debian"} or not codename:
+        raise ValueError(f"Unsupported WineHQ repository: family={family!r}, codename={codename!r}")
+    return (f"deb [signed-by={KEY_PATH}] https://dl.winehq.org/wine-builds/{family}/ "
+            f"{codename} main\n")
+
+def sources_path(codename):
+    return f"/etc/apt/sources.list.d/winehq-{codename}.list"
+
+def build_plan(family, codename, branch="stable", recommends=False, key_sha256=None):
+    """Steps to install <code>winehq-&lt;branch&gt;</code>; the first three are independent."""
     pkg = f"winehq-{branch}"
-    # Wine necesita runtime i386 y fuentes comunes
-    base = " --install-recommends" if recommends else ""
-    run(f"apt-get install -y{base} {pkg}", apply)
+    line = sources_line(family, codename).encode()
+
+    def arch_ok(r, status):
+        code, out = r.query(["dpkg", "--print-foreign-architectures"])
+        return code == 0 and "i386" in out.split()
+
+    def add_arch(r):
+        r.run(["dpkg", "--add-architecture", "i386"])
+
+    def key_ok(r, status):
+        data = r.read_file(KEY_PATH)
+        if not data:
+            return False
+        return key_sha256 is None or hashlib.sha256(data).hexdigest() == key_sha256.lower()
+
+    def fetch_key(r):
+        r.run(["mkdir", "-p", KEYRING_DIR])
+        if key_sha256 is None:
+            r.run(["wget", "-qO", KEY_PATH, KEY_URL])
+            return
+        # se descarga aparte y solo se instala si coincide el hash
+        tmp = KEY_PATH + ".download"
+        r.run(["wget", "-qO", tmp, KEY_URL])
+        data = r.read_file(tmp)
+        if data is None and r.dry_run:
+            pass  # simulación: no hay descarga que comprobar
+        elif data is None or hashlib.sha256(data).hexdigest() != key_sha256.lower():
+            r.run(["rm", "-f", tmp])
+            got = hashlib.sha256(data).hexdigest() if data is not None else "nothing downloaded"
+            raise RuntimeError(f"WineHQ key checksum mismatch: expected {key_sha256}, got {got}")
+        r.run(["mv", tmp, KEY_PATH])
+
+    def sources_ok(r, status):
+        return r.read_file(sources_path(codename)) == line
+
+    def write_sources(r):
+        r.write_file(sources_path(codename), line)
+
+    def update_ok(r, status):
+        # solo si cambió algo de lo que depende apt (y ya hay índices de WineHQ)
+        if any(status[name] != "satisfied" for name in ("architecture", "key", "sources")):
+            return False
+        return bool(r.glob(f"{APT_LISTS}/dl.winehq.org_*"))
+
+    def update(r):
+        r.run(["apt-get", "update"])
+
+    def install_ok(r, status):
+        # instalado y en la versión que instalaría apt (la candidata de WineHQ)
+        code, out = r.query(["dpkg-query", "-W", "-f=${Status} ${Version}", pkg])
+        if code != 0 or not out.startswith("install ok installed"):
+            return False
+        installed = out[len("install ok installed"):].strip()
+        code, policy = r.query(["apt-cache", "policy", pkg])
+        candidate = next((l.split(":", 1)[1].strip() for l in policy.splitlines()
+                          if l.strip().startswith("Candidate:")), None)
+        return code == 0 and bool(installed) and installed == candidate
+
+    def install(r):
+        r.run(["apt-get", "install", "-y"] + (["--install-recommends"] if recommends else []) + [pkg])
+
+    return [
+        Step("architecture", arch_ok, add_arch),
+        Step("key", key_ok, fetch_key),
+        Step("sources", sources_ok, write_sources),
+        Step("apt-update", update_ok, update, after=("architecture", "key", "sources")),
+        Step("install", install_ok, install, after=("apt-update",)),
+    ]
+
+def execute_plan(steps, runner, jobs=4):
+    """
+    Run <code>steps</code> in dependency order; steps whose dependencies are done run
+    concurrently. Returns <code>{name: "satisfied" | "done"}</code>.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    status = {}
+
+    def go(step):
+        if step.check(runner, status):
+            print(f"✓ {step.name}: ya satisfecho")
+            return "satisfied"
+        step.action(runner)
+        return "done"
+
+    remaining = list(steps)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while remaining:
+            wave = [s for s in remaining if all(d in status for d in s.after)]
+            if not wave:
+                raise RuntimeError(f"Unresolvable step dependencies: {[s.name for s in remaining]}")
+            for step, result in zip(wave, pool.map(go, wave)):
+                status[step.name] = result
+                remaining.remove(step)
+    return status
 
 def remove_wine(apply):
     cmds = [
@@ -102,11 +286,14 @@ def main():
                         help="Sobrescribir codename (ej. jammy, noble, bookworm...). Autodetectado si no se define.")
     parser.add_argument("--recommends", action="store_true",
                         help="Instalar también paquetes recomendados (suele venir bien para fuentes/gtk/etc.)")
+    parser.add_argument("--key-sha256", default=None,
+                        help="SHA-256 esperado de la clave de WineHQ (si no coincide, se vuelve a descargar)")
     parser.add_argument("--remove", action="store_true",
                         help="Eliminar Wine y repos WineHQ del sistema")
     args = parser.parse_args()
 
     # Información previa
+    import platform
     print(f"💻 Sistema: {platform.system()} {platform.release()}")
     family, codename = detect_family_and_codename(args.codename)
 
@@ -129,20 +316,25 @@ def main():
         # si insiste con --apply sin codename válido, abortamos
         if not codename:
             sys.exit(2)
+        # como antes: cualquier familia no reconocida usa el repositorio de debian
+        print("    Usando el repositorio de debian.")
+        family = "debian"
 
     if args.apply:
         require_root()
 
     print(f"🛠  Preparando instalación WineHQ ({args.branch}) para {family} {codename}…")
 
-    # Pasos
-    add_architecture(args.apply)
-    if family == "ubuntu":
-        add_key_and_repo_ubuntu(codename, args.apply)
-    else:
-        add_key_and_repo_debian(codename, args.apply)
-    apt_update(args.apply)
-    install_wine(args.branch, args.apply, args.recommends)
+    # Pasos: solo se ejecutan los que no están ya satisfechos
+    plan = build_plan(family, codename, args.branch, args.recommends, args.key_sha256)
+    try:
+        status = execute_plan(plan, ShellRunner(args.apply))
+    except (RuntimeError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    ran = [name for name, state in status.items() if state == "done"]
+    print(f"📋 {len(ran)} paso(s) {'ejecutados' if args.apply else 'pendientes'}, "
+          f"{len(status) - len(ran)} ya satisfechos")
 
     # Resultado
     if args.apply:
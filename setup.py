@@ -12,12 +12,14 @@ setup(
     packages=find_packages(),  # Encuentra  los paquetes en la carpeta src
     entry_points={
         "console_scripts": [
-            "djgit_copylibs=djgit.copylibs:main",
+            "djgit_copylibs=djgit.copylibs:cli",
             "djgit_addpath=djgit.addpath:addpath",
             "djgit_docs=djgit.py2md_docs:main",
             "djgit_create_env=djgit.create_env:main",
             "djgit_set_ps=djgit.set_ps:main",
             "djgit_wine_setup=djgit.wine_setup:main",
+            "djgit_wheels=djgit.wheelplan:main",
+            "djgit=djgit.cli:main",
         ]
     },
     project_urls={
@@ -26,7 +28,7 @@ setup(
     },
     # from requeriments.txt
     install_requires=open('requirements.txt').read().splitlines(),
-    python_requires='>=3.6',  #   de Python requerida
+    python_requires='>=3.7',  #   de Python requerida
     classifiers=[  # Clasificadores que ayudan a otros desarrolladores a encontrar tu proyecto
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",  # Tipo de licencia